@@ -17,85 +17,56 @@
 
 
 
+import logging
 import os
-import json
+import re
 from typing import List, Dict, Any
-from utils.gemini_client import get_gemini_client
+from agents.fused_extractor import get_fused_extractor
+from utils.fallback import mark_fallback
+from utils.pipeline_cache import acached
+
+logger = logging.getLogger(__name__)
+
+# One pass over the chapter finds every mock-fallback keyword ("Sarah" stays case-sensitive)
+_CHARACTER_KEYWORDS_RE = re.compile(r"(?-i:Sarah)|mother|mom", re.IGNORECASE)
 
 class CharacterExtractor:
     def __init__(self):
-        self.client = get_gemini_client()
+        self.fused_extractor = get_fused_extractor()
     
+    @acached
     async def extract_characters(self, chapter_text: str) -> List[Dict[str, Any]]:
         """Extract character information from chapter text"""
         
-        print(f"CharacterExtractor: Analyzing chapter for characters ({len(chapter_text)} characters)")
+        logger.debug("CharacterExtractor: Analyzing chapter for characters (%s characters)", len(chapter_text))
         
         try:
             # Use Gemini API for intelligent character extraction
             return await self._extract_with_gemini(chapter_text)
         except Exception as e:
-            print(f"Gemini API failed in CharacterExtractor: {str(e)}")
+            logger.warning("Gemini API failed in CharacterExtractor: %s", e)
             # Fallback to mock implementation
             return self._get_mock_characters(chapter_text)
     
     async def _extract_with_gemini(self, chapter_text: str) -> List[Dict[str, Any]]:
-        """Use Gemini API for intelligent character extraction"""
+        """Use the fused Gemini extraction shared with LoreMaster"""
         
-        prompt = f"""You are a CharacterExtractor AI agent. Your task is to extract character information from a chapter of text.
-
-CORE PHILOSOPHY: Be precise and factual. Only extract characters that actually appear or are mentioned in the text.
-
-CHAPTER TEXT:
-{chapter_text}
-
-EXTRACTION INSTRUCTIONS:
-1. Identify all characters mentioned in the text
-2. For each character, extract:
-   - name (exactly as mentioned)
-   - description (what the text says about them)
-   - backstory (any background information provided)
-   - personality (traits mentioned or implied)
-   - first_appearance (how/when they first appear)
-3. Only include characters that actually appear in the text
-4. Be factual and precise - don't invent information
-5. Return as a JSON array of character objects
-
-RETURN FORMAT:
-[
-  {{
-    "name": "Character Name",
-    "description": "Description from text",
-    "backstory": "Background information if mentioned",
-    "personality": "Personality traits from text",
-    "first_appearance": "How they first appear in story"
-  }}
-]
-
-Return ONLY the JSON array, no additional text."""
-
         try:
-            response = await self.client.generate_text(
-                prompt=prompt,
-                max_tokens=1000,
-                temperature=0.1,
-                system_message="You are a CharacterExtractor AI that identifies and extracts character information from text."
-            )
-            
-            # Parse the JSON response
-            characters = json.loads(response.strip())
+            characters, _ = await self.fused_extractor.extract(chapter_text)
             return characters
             
         except Exception as e:
-            print(f"Gemini character extraction failed: {e}")
+            logger.warning("Gemini character extraction failed: %s", e)
             return self._get_mock_characters(chapter_text)
     
     def _get_mock_characters(self, chapter_text: str) -> List[Dict[str, Any]]:
         """Fallback mock character extraction when API is unavailable"""
+        mark_fallback()
         characters = []
+        hits = {match.group().lower() for match in _CHARACTER_KEYWORDS_RE.finditer(chapter_text)}
         
         # Look for common character names and patterns
-        if "Sarah" in chapter_text:
+        if "sarah" in hits:
             characters.append({
                 "name": "Sarah",
                 "description": "Main character, young woman experiencing magical transformation",
@@ -104,7 +75,7 @@ Return ONLY the JSON array, no additional text."""
                 "first_appearance": "Introduced waking up in bed, feeling tingling sensations"
             })
         
-        if "mother" in chapter_text.lower() or "mom" in chapter_text.lower():
+        if "mother" in hits or "mom" in hits:
             characters.append({
                 "name": "Mother",
                 "description": "Sarah's mother, possibly aware of magical heritage",
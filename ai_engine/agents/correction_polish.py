@@ -11,30 +11,20 @@
 
 
 
+import logging
 import os
+import re
+from utils.fallback import mark_fallback
 from utils.gemini_client import get_gemini_client
+from utils.pipeline_cache import acached
 
-class CorrectionPolishAI:
-    def __init__(self):
-        self.client = get_gemini_client()
-    
-    async def polish_chapter(self, raw_chapter: str, style_guide: str, chapter_brief: str) -> str:
-        """Edit and polish the entire chapter for grammar, flow, and quality"""
-        
-        print(f"CorrectionPolishAI: Polishing chapter ({len(raw_chapter)} characters)")
-        
-        try:
-            # Use Gemini API for intelligent polishing
-            return await self._polish_with_gemini(raw_chapter, style_guide, chapter_brief)
-        except Exception as e:
-            print(f"Gemini API failed in CorrectionPolishAI: {str(e)}")
-            # Fallback to basic polishing
-            return self._basic_polish(raw_chapter)
-    
-    async def _polish_with_gemini(self, raw_chapter: str, style_guide: str, chapter_brief: str) -> str:
-        """Use Gemini API for intelligent chapter polishing"""
-        
-        prompt = f"""You are a CorrectionPolish AI agent. Your task is to edit and polish a chapter for grammar, flow, and quality while preserving the author's intent.
+logger = logging.getLogger(__name__)
+
+# Spaces before a period/comma (group 1, dropped) or runs of spaces (collapsed to one)
+_SPACING_RE = re.compile(r"( +)(?=[.,])| {2,}")
+
+# Static prompt body; only the chapter, style guide and brief vary per call
+_PROMPT_TEMPLATE = """You are a CorrectionPolish AI agent. Your task is to edit and polish a chapter for grammar, flow, and quality while preserving the author's intent.
 
 CORE PHILOSOPHY: You are an EDITOR, not a rewriter. Preserve the author's voice and intent.
 
@@ -67,6 +57,33 @@ EDITING APPROACH:
 
 Return the polished chapter that maintains all the original content while being technically sound and well-flowing."""
 
+class CorrectionPolishAI:
+    def __init__(self):
+        self.client = get_gemini_client()
+    
+    @acached
+    async def polish_chapter(self, raw_chapter: str, style_guide: str, chapter_brief: str) -> str:
+        """Edit and polish the entire chapter for grammar, flow, and quality"""
+        
+        logger.debug("CorrectionPolishAI: Polishing chapter (%s characters)", len(raw_chapter))
+        
+        try:
+            # Use Gemini API for intelligent polishing
+            return await self._polish_with_gemini(raw_chapter, style_guide, chapter_brief)
+        except Exception as e:
+            logger.warning("Gemini API failed in CorrectionPolishAI: %s", e)
+            # Fallback to basic polishing
+            return self._basic_polish(raw_chapter)
+    
+    async def _polish_with_gemini(self, raw_chapter: str, style_guide: str, chapter_brief: str) -> str:
+        """Use Gemini API for intelligent chapter polishing"""
+        
+        prompt = _PROMPT_TEMPLATE.format(
+            raw_chapter=raw_chapter,
+            style_guide=style_guide,
+            chapter_brief=chapter_brief
+        )
+
         try:
             response = await self.client.generate_text(
                 prompt=prompt,
@@ -78,27 +95,19 @@ Return the polished chapter that maintains all the original content while being
             return response.strip()
             
         except Exception as e:
-            print(f"Gemini polishing failed: {e}")
+            logger.warning("Gemini polishing failed: %s", e)
             return self._basic_polish(raw_chapter)
     
     def _basic_polish(self, raw_chapter: str) -> str:
         """Fallback basic polishing when API is unavailable"""
-        # Simple polishing - fix obvious issues while preserving content
-        polished = raw_chapter
-        
-        # Basic grammar fixes
-        polished = polished.replace("  ", " ")  # Remove double spaces
-        polished = polished.replace(" .", ".")  # Fix spacing before periods
-        polished = polished.replace(" ,", ",")  # Fix spacing before commas
-        
-        # Ensure proper paragraph breaks
-        paragraphs = polished.split("\n\n")
-        cleaned_paragraphs = []
-        for para in paragraphs:
-            if para.strip():  # Only include non-empty paragraphs
-                cleaned_paragraphs.append(para.strip())
+        mark_fallback()
+        # Simple polishing - fix obvious spacing issues in one pass while preserving content
+        polished = _SPACING_RE.sub(lambda match: "" if match.group(1) else " ", raw_chapter)
         
-        polished = "\n\n".join(cleaned_paragraphs)
+        # Ensure proper paragraph breaks, dropping empty paragraphs
+        polished = "\n\n".join(
+            stripped for para in polished.split("\n\n") if (stripped := para.strip())
+        )
         
         return polished
 
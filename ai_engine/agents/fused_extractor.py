@@ -0,0 +1,211 @@
+import asyncio
+import json
+import logging
+from typing import List, Dict, Any, Tuple
+from utils.fallback import mark_fallback
+from utils.gemini_client import get_gemini_client
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; the stdlib decodes the same documents, just slower
+    _json_loads = json.loads
+
+# Chapters longer than this (~3k tokens) are extracted window by window and merged
+_MAX_INPUT_CHARS = 12000
+
+def _split_windows(text: str, max_chars: int) -> List[str]:
+    """Split text into windows of at most max_chars, breaking on paragraph boundaries where possible"""
+    windows = []
+    current = ""
+    for para in text.split("\n\n"):
+        candidate = f"{current}\n\n{para}" if current else para
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            windows.append(current)
+        # A single oversized paragraph is hard-split so no window exceeds the budget
+        while len(para) > max_chars:
+            windows.append(para[:max_chars])
+            para = para[max_chars:]
+        current = para
+    if current:
+        windows.append(current)
+    return windows
+
+# Static prompt body; only the chapter text varies per call
+_PROMPT_TEMPLATE = """You are a WorldBuilding extraction AI agent. Your task is to extract character information and world-building lore from a chapter of text.
+
+CORE PHILOSOPHY: Be precise and factual. Only extract characters and lore that actually appear or are mentioned in the text.
+
+CHAPTER TEXT:
+{chapter_text}
+
+CHARACTER EXTRACTION INSTRUCTIONS:
+1. Identify all characters mentioned in the text
+2. For each character, extract:
+   - name (exactly as mentioned)
+   - description (what the text says about them)
+   - backstory (any background information provided)
+   - personality (traits mentioned or implied)
+   - first_appearance (how/when they first appear)
+3. Only include characters that actually appear in the text
+
+LORE EXTRACTION INSTRUCTIONS:
+1. Identify all world-building elements in the text
+2. For each element, extract:
+   - type (location, concept, time, object, organization, etc.)
+   - name (what it's called in the text)
+   - description (what the text says about it)
+   - significance (why it matters to the story/world)
+   - details (specific information provided)
+3. Only include lore that actually appears in the text
+
+LORE TYPES TO LOOK FOR:
+- Locations (places, settings, environments)
+- Concepts (ideas, beliefs, systems)
+- Objects (items, artifacts, tools)
+- Organizations (groups, factions, institutions)
+- Time periods (eras, seasons, specific times)
+- Events (historical, current, planned)
+- Magical/special elements (powers, rules, phenomena)
+
+Be factual and precise - don't invent information.
+
+RETURN FORMAT:
+{{
+  "characters": [
+    {{
+      "name": "Character Name",
+      "description": "Description from text",
+      "backstory": "Background information if mentioned",
+      "personality": "Personality traits from text",
+      "first_appearance": "How they first appear in story"
+    }}
+  ],
+  "lore": [
+    {{
+      "type": "location",
+      "name": "Location Name",
+      "description": "Description from text",
+      "significance": "Why this matters to story/world",
+      "details": "Specific details from text"
+    }}
+  ]
+}}
+
+Return ONLY the JSON object, no additional text."""
+
+def _string_object_schema(*fields: str) -> Dict[str, Any]:
+    """JSON schema for an object whose fields are all required strings"""
+    return {
+        "type": "object",
+        "properties": {field: {"type": "string"} for field in fields},
+        "required": list(fields),
+        "additionalProperties": False
+    }
+
+# Structured-output schema mirroring the RETURN FORMAT block in the prompt
+_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "characters": {
+            "type": "array",
+            "items": _string_object_schema("name", "description", "backstory", "personality", "first_appearance")
+        },
+        "lore": {
+            "type": "array",
+            "items": _string_object_schema("type", "name", "description", "significance", "details")
+        }
+    },
+    "required": ["characters", "lore"],
+    "additionalProperties": False
+}
+
+class FusedExtractor:
+    def __init__(self):
+        self.client = get_gemini_client()
+        # Chapter text -> pending extraction, so concurrent callers share one API request
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def extract(self, chapter_text: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Extract characters and lore from chapter text in a single pass"""
+
+        task = self._inflight.get(chapter_text)
+        if task is None:
+            task = asyncio.ensure_future(self._extract_chapter(chapter_text))
+            self._inflight[chapter_text] = task
+            task.add_done_callback(lambda _: self._inflight.pop(chapter_text, None))
+
+        # Shield so one cancelled caller doesn't cancel the request for everyone else
+        return await asyncio.shield(task)
+
+    async def _extract_chapter(self, chapter_text: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Extract from the whole chapter, map-reducing over windows when it exceeds the input budget"""
+
+        if len(chapter_text) <= _MAX_INPUT_CHARS:
+            return await self._extract_with_gemini(chapter_text)
+
+        windows = _split_windows(chapter_text, _MAX_INPUT_CHARS)
+        logger.debug("FusedExtractor: Splitting %s characters into %s windows", len(chapter_text), len(windows))
+        results = await asyncio.gather(
+            *(self._extract_with_gemini(window) for window in windows),
+            return_exceptions=True
+        )
+
+        # One window with malformed JSON shouldn't discard what the other windows extracted
+        failures = [(index, result) for index, result in enumerate(results) if isinstance(result, Exception)]
+        if len(failures) == len(results):
+            raise failures[0][1]
+        for index, error in failures:
+            logger.warning("FusedExtractor: Window %s of %s failed: %s", index + 1, len(windows), error)
+        if failures:
+            # A partial extraction is still returned, but mustn't be cached as the chapter's full result
+            mark_fallback()
+
+        # The same character or lore entry usually shows up in several windows; keep the first sighting
+        characters: Dict[str, Dict[str, Any]] = {}
+        lore_entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for result in results:
+            if isinstance(result, Exception):
+                continue
+            window_characters, window_lore = result
+            for character in window_characters:
+                characters.setdefault(str(character.get("name", "")).strip().lower(), character)
+            for lore in window_lore:
+                key = (str(lore.get("type", "")).strip().lower(), str(lore.get("name", "")).strip().lower())
+                lore_entries.setdefault(key, lore)
+
+        return list(characters.values()), list(lore_entries.values())
+
+    async def _extract_with_gemini(self, chapter_text: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Use Gemini API to extract characters and lore with one prompt"""
+
+        logger.debug("FusedExtractor: Analyzing chapter for characters and lore (%s characters)", len(chapter_text))
+
+        prompt = _PROMPT_TEMPLATE.format(chapter_text=chapter_text)
+
+        response = await self.client.generate_text(
+            prompt=prompt,
+            max_tokens=2000,
+            temperature=0.1,
+            system_message="You are a WorldBuilding AI that extracts character information and world-building lore from text.",
+            response_schema=_RESPONSE_SCHEMA
+        )
+
+        # Structured output returns bare JSON; the slice only matters for models that ignore the schema
+        result = _json_loads(response[response.find("{"):response.rfind("}") + 1])
+        return result["characters"], result["lore"]
+
+# Create a singleton instance so CharacterExtractor and LoreMaster share in-flight requests
+fused_extractor = None
+
+def get_fused_extractor():
+    """Get or create the singleton FusedExtractor instance"""
+    global fused_extractor
+    if fused_extractor is None:
+        fused_extractor = FusedExtractor()
+    return fused_extractor
@@ -2,25 +2,21 @@
 
 
 
+import logging
 import os
 from typing import Optional
+from utils.fallback import mark_fallback
 from utils.gemini_client import get_gemini_client
+from utils.pipeline_cache import acached
 
-class IntentAnalyst:
-    def __init__(self):
-        self.client = get_gemini_client()
-    
-    async def analyze_intent(self, summary: str, previous_chapter: Optional[str], genre: str) -> str:
-        """Analyze the author's intent and create a chapter brief"""
-        
-        print(f"IntentAnalyst: Analyzing intent for {genre} story")
-        
-        # Create a comprehensive prompt for Gemini
-        prompt = f"""As an expert literary analyst, analyze the following story summary and create a detailed chapter brief.
+logger = logging.getLogger(__name__)
+
+# Static prompt body; only the summary, genre and previous chapter vary per call
+_PROMPT_TEMPLATE = """As an expert literary analyst, analyze the following story summary and create a detailed chapter brief.
 
 STORY SUMMARY: {summary}
 GENRE: {genre}
-PREVIOUS CHAPTER: {previous_chapter if previous_chapter else 'None (First chapter)'}
+PREVIOUS CHAPTER: {previous_chapter}
 
 Please create a comprehensive chapter brief that includes:
 
@@ -34,23 +30,8 @@ The brief should be specific to the {genre} genre and should guide the writing o
 
 Format the response as a professional chapter brief with clear sections."""
 
-        try:
-            # Use Gemini API to generate the chapter brief
-            chapter_brief = await self.client.generate_text(
-                prompt=prompt,
-                max_tokens=1500,
-                temperature=0.7,
-                system_message="You are an expert literary analyst and writing coach specializing in genre fiction."
-            )
-            
-            print(f"Generated chapter brief: {chapter_brief[:100]}...")
-            return chapter_brief
-            
-        except Exception as e:
-            print(f"Gemini API failed in IntentAnalyst: {str(e)}")
-            # Fallback to the original mock implementation
-            if "fantasy" in genre.lower():
-                return f"""CHAPTER BRIEF - Fantasy Genre
+# Fallback chapter briefs used when the API is unavailable; only the summary/genre slots vary
+_FANTASY_BRIEF_TEMPLATE = """CHAPTER BRIEF - Fantasy Genre
 
 TONE AND STYLE REQUIREMENTS:
 - Maintain a sense of wonder and magical atmosphere
@@ -78,8 +59,8 @@ QUALITY STANDARDS:
 - Fantasy readers expect immersive world-building
 - Avoid clichés while maintaining genre conventions
 - Balance exposition with action and dialogue"""
-            else:
-                return f"""CHAPTER BRIEF - {genre.upper()} Genre
+
+_GENERIC_BRIEF_TEMPLATE = """CHAPTER BRIEF - {genre_upper} Genre
 
 TONE AND STYLE REQUIREMENTS:
 - Maintain appropriate tone for {genre} genre
@@ -102,5 +83,40 @@ QUALITY STANDARDS:
 - Maintain reader engagement through compelling narrative
 - Balance description with action and dialogue"""
 
+class IntentAnalyst:
+    def __init__(self):
+        self.client = get_gemini_client()
+    
+    @acached
+    async def analyze_intent(self, summary: str, previous_chapter: Optional[str], genre: str) -> str:
+        """Analyze the author's intent and create a chapter brief"""
+        
+        logger.debug("IntentAnalyst: Analyzing intent for %s story", genre)
+        
+        # Create a comprehensive prompt for Gemini
+        prompt = _PROMPT_TEMPLATE.format(
+            summary=summary,
+            genre=genre,
+            previous_chapter=previous_chapter if previous_chapter else 'None (First chapter)'
+        )
 
-
+        try:
+            # Use Gemini API to generate the chapter brief
+            chapter_brief = await self.client.generate_text(
+                prompt=prompt,
+                max_tokens=1500,
+                temperature=0.7,
+                system_message="You are an expert literary analyst and writing coach specializing in genre fiction."
+            )
+            
+            logger.debug("Generated chapter brief: %s...", chapter_brief[:100])
+            return chapter_brief
+            
+        except Exception as e:
+            logger.warning("Gemini API failed in IntentAnalyst: %s", e)
+            # Fallback to the original mock implementation
+            mark_fallback()
+            if "fantasy" in genre.lower():
+                return _FANTASY_BRIEF_TEMPLATE.format(summary=summary)
+            else:
+                return _GENERIC_BRIEF_TEMPLATE.format(genre=genre, genre_upper=genre.upper(), summary=summary)
@@ -21,94 +21,56 @@
 
 
 
+import logging
 import os
-import json
+import re
 from typing import List, Dict, Any
-from utils.gemini_client import get_gemini_client
+from agents.fused_extractor import get_fused_extractor
+from utils.fallback import mark_fallback
+from utils.pipeline_cache import acached
+
+logger = logging.getLogger(__name__)
+
+# One pass over the chapter finds every mock-fallback keyword
+_LORE_KEYWORDS_RE = re.compile(r"suburban town|magical|powers|morning|sun|bed|room", re.IGNORECASE)
 
 class LoreMaster:
     def __init__(self):
-        self.client = get_gemini_client()
+        self.fused_extractor = get_fused_extractor()
     
+    @acached
     async def extract_lore(self, chapter_text: str) -> List[Dict[str, Any]]:
         """Extract world-building lore from chapter text"""
         
-        print(f"LoreMaster: Analyzing chapter for world-building elements ({len(chapter_text)} characters)")
+        logger.debug("LoreMaster: Analyzing chapter for world-building elements (%s characters)", len(chapter_text))
         
         try:
             # Use Gemini API for intelligent lore extraction
             return await self._extract_with_gemini(chapter_text)
         except Exception as e:
-            print(f"Gemini API failed in LoreMaster: {str(e)}")
+            logger.warning("Gemini API failed in LoreMaster: %s", e)
             # Fallback to mock implementation
             return self._get_mock_lore(chapter_text)
     
     async def _extract_with_gemini(self, chapter_text: str) -> List[Dict[str, Any]]:
-        """Use Gemini API for intelligent lore extraction"""
+        """Use the fused Gemini extraction shared with CharacterExtractor"""
         
-        prompt = f"""You are a LoreMaster AI agent. Your task is to extract world-building lore from a chapter of text.
-
-CORE PHILOSOPHY: Be precise and factual. Only extract lore that actually appears in the text.
-
-CHAPTER TEXT:
-{chapter_text}
-
-LORE EXTRACTION INSTRUCTIONS:
-1. Identify all world-building elements in the text
-2. For each element, extract:
-   - type (location, concept, time, object, organization, etc.)
-   - name (what it's called in the text)
-   - description (what the text says about it)
-   - significance (why it matters to the story/world)
-   - details (specific information provided)
-3. Only include lore that actually appears in the text
-4. Be factual and precise - don't invent information
-5. Return as a JSON array of lore objects
-
-LORE TYPES TO LOOK FOR:
-- Locations (places, settings, environments)
-- Concepts (ideas, beliefs, systems)
-- Objects (items, artifacts, tools)
-- Organizations (groups, factions, institutions)
-- Time periods (eras, seasons, specific times)
-- Events (historical, current, planned)
-- Magical/special elements (powers, rules, phenomena)
-
-RETURN FORMAT:
-[
-  {{
-    "type": "location",
-    "name": "Location Name",
-    "description": "Description from text",
-    "significance": "Why this matters to story/world",
-    "details": "Specific details from text"
-  }}
-]
-
-Return ONLY the JSON array, no additional text."""
-
         try:
-            response = await self.client.generate_text(
-                prompt=prompt,
-                max_tokens=1000,
-                temperature=0.1,
-                system_message="You are a LoreMaster AI that extracts world-building information from text."
-            )
-            
-            # Parse the JSON response
-            lore_entries = json.loads(response.strip())
+            _, lore_entries = await self.fused_extractor.extract(chapter_text)
             return lore_entries
             
         except Exception as e:
-            print(f"Gemini lore extraction failed: {e}")
+            logger.warning("Gemini lore extraction failed: %s", e)
             return self._get_mock_lore(chapter_text)
     
     def _get_mock_lore(self, chapter_text: str) -> List[Dict[str, Any]]:
         """Fallback mock lore extraction when API is unavailable"""
+        mark_fallback()
         lore_entries = []
+        hits = {match.group().lower() for match in _LORE_KEYWORDS_RE.finditer(chapter_text)}
         
         # Look for locations and settings
-        if "suburban town" in chapter_text.lower():
+        if "suburban town" in hits:
             lore_entries.append({
                 "type": "location",
                 "name": "Suburban Town",
@@ -117,7 +79,7 @@ Return ONLY the JSON array, no additional text."""
                 "details": "Quiet, ordinary neighborhood where magical events begin"
             })
         
-        if "bed" in chapter_text.lower() and "room" in chapter_text.lower():
+        if "bed" in hits and "room" in hits:
             lore_entries.append({
                 "type": "location",
                 "name": "Sarah's Bedroom",
@@ -127,7 +89,7 @@ Return ONLY the JSON array, no additional text."""
             })
         
         # Look for magical elements
-        if "magical" in chapter_text.lower() or "powers" in chapter_text.lower():
+        if "magical" in hits or "powers" in hits:
             lore_entries.append({
                 "type": "concept",
                 "name": "Magical Powers",
@@ -137,7 +99,7 @@ Return ONLY the JSON array, no additional text."""
             })
         
         # Look for time/atmospheric elements
-        if "morning" in chapter_text.lower() or "sun" in chapter_text.lower():
+        if "morning" in hits or "sun" in hits:
             lore_entries.append({
                 "type": "time",
                 "name": "Morning Transformation",
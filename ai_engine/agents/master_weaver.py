@@ -8,31 +8,18 @@
 
 
 
+import logging
 import os
-from typing import List
+import asyncio
+from typing import List, Tuple
+from utils.fallback import mark_fallback
 from utils.gemini_client import get_gemini_client
+from utils.pipeline_cache import acached
 
-class MasterWeaver:
-    def __init__(self):
-        self.client = get_gemini_client()
-    
-    async def weave_content(self, plot_point: str, scraped_content: str, style_guide: str, chapter_brief: str) -> str:
-        """Weave plot point with scraped human-written content into a polished paragraph"""
-        
-        print(f"MasterWeaver: Weaving content for plot point: {plot_point[:50]}...")
-        
-        try:
-            # Use Gemini API to weave content intelligently
-            return await self._weave_with_gemini(plot_point, scraped_content, style_guide, chapter_brief)
-        except Exception as e:
-            print(f"Gemini API failed in MasterWeaver: {str(e)}")
-            # Fallback to mock implementation
-            return self._get_mock_woven_content(plot_point)
-    
-    async def _weave_with_gemini(self, plot_point: str, scraped_content: str, style_guide: str, chapter_brief: str) -> str:
-        """Use Gemini API to weave content intelligently"""
-        
-        prompt = f"""You are a MasterWeaver AI agent. Your task is to weave together a plot point with human-written descriptive content into a single, polished paragraph.
+logger = logging.getLogger(__name__)
+
+# Static prompt body; only the plot point, research, style guide and brief vary per call
+_PROMPT_TEMPLATE = """You are a MasterWeaver AI agent. Your task is to weave together a plot point with human-written descriptive content into a single, polished paragraph.
 
 CORE PHILOSOPHY: You are NOT being creative. You are ASSEMBLING existing human-written content to serve the user's plot.
 
@@ -61,6 +48,42 @@ INSTRUCTIONS:
 WEAVE TOGETHER:
 Create a single paragraph that seamlessly combines the plot point with the descriptive content, following the style guide."""
 
+class MasterWeaver:
+    def __init__(self):
+        self.client = get_gemini_client()
+    
+    @acached
+    async def weave_content(self, plot_point: str, scraped_content: str, style_guide: str, chapter_brief: str) -> str:
+        """Weave plot point with scraped human-written content into a polished paragraph"""
+        
+        logger.debug("MasterWeaver: Weaving content for plot point: %s...", plot_point[:50])
+        
+        try:
+            # Use Gemini API to weave content intelligently
+            return await self._weave_with_gemini(plot_point, scraped_content, style_guide, chapter_brief)
+        except Exception as e:
+            logger.warning("Gemini API failed in MasterWeaver: %s", e)
+            # Fallback to mock implementation
+            return self._get_mock_woven_content(plot_point)
+    
+    async def weave_batch(self, items: List[Tuple[str, str, str, str]]) -> List[str]:
+        """Weave many (plot_point, scraped_content, style_guide, chapter_brief) items, preserving input order"""
+        
+        logger.debug("MasterWeaver: Weaving batch of %s plot points", len(items))
+        
+        # Submit every weave at once; the shared client bounds how many hit the API concurrently
+        return list(await asyncio.gather(*(self.weave_content(*item) for item in items)))
+    
+    async def _weave_with_gemini(self, plot_point: str, scraped_content: str, style_guide: str, chapter_brief: str) -> str:
+        """Use Gemini API to weave content intelligently"""
+        
+        prompt = _PROMPT_TEMPLATE.format(
+            plot_point=plot_point,
+            scraped_content=scraped_content,
+            style_guide=style_guide,
+            chapter_brief=chapter_brief
+        )
+
         try:
             response = await self.client.generate_text(
                 prompt=prompt,
@@ -72,11 +95,12 @@ Create a single paragraph that seamlessly combines the plot point with the descr
             return response.strip()
             
         except Exception as e:
-            print(f"Gemini weaving failed: {e}")
+            logger.warning("Gemini weaving failed: %s", e)
             return self._get_mock_woven_content(plot_point)
     
     def _get_mock_woven_content(self, plot_point: str) -> str:
         """Fallback mock woven content when API is unavailable"""
+        mark_fallback()
         if "magical powers" in plot_point.lower():
             return f"""The morning light filtered through the curtains as Sarah stretched languidly in her bed, unaware that today would change everything. {plot_point} She had always been an ordinary girl, living an ordinary life in her small suburban town, but as the sun climbed higher in the sky, she felt an unfamiliar tingling sensation spreading through her fingertips. The air around her seemed to shimmer with possibility, and for the first time in her eighteen years, Sarah wondered if there might be more to the world than she had ever imagined."""
         else:
@@ -4,20 +4,25 @@
 
 
 
+import logging
 import os
+import asyncio
+import re
 from typing import List
+from utils.fallback import mark_fallback
 from utils.gemini_client import get_gemini_client
+from utils.pipeline_cache import acached
 
-class SceneScout:
-    def __init__(self):
-        self.client = get_gemini_client()
-    
-    async def deconstruct_summary(self, summary: str) -> List[str]:
-        """Deconstruct story summary into key plot points"""
-        
-        print(f"SceneScout: Deconstructing summary: {summary}")
-        
-        prompt = f"""As a story structure expert, deconstruct this story summary into 4-6 key plot points.
+logger = logging.getLogger(__name__)
+
+# One pass over the summary finds every mock-fallback keyword
+_PLOT_KEYWORDS_RE = re.compile(r"magical powers|birthday", re.IGNORECASE)
+
+# Numbered ("1." / "1)") or bulleted ("-" / "*") list items, capturing the item text
+_LIST_ITEM_RE = re.compile(r"^[ \t]*(?:\d+[.)]|[-*])[ \t]+(.+?)[ \t]*$", re.MULTILINE)
+
+# Static prompt bodies; only the interpolated story details vary per call
+_DECONSTRUCT_PROMPT_TEMPLATE = """As a story structure expert, deconstruct this story summary into 4-6 key plot points.
 
 STORY SUMMARY: {summary}
 
@@ -29,6 +34,32 @@ Requirements:
 
 Format your response as a numbered list with clear, descriptive sentences for each plot point."""
 
+_SEARCH_QUERY_PROMPT_TEMPLATE = """As a research assistant, generate a specific search query to find human-written descriptive content for this plot point.
+
+PLOT POINT: {plot_point}
+GENRE: {genre}
+CHAPTER BRIEF CONTEXT: {chapter_brief}...
+
+Requirements:
+- Create a search query that would find descriptive passages from existing literature
+- Focus on finding authentic, human-written descriptions that could inspire this scene
+- The query should be specific enough to find relevant content but broad enough to find multiple sources
+- Include genre-specific terms when appropriate
+
+Format your response as a single search query string (no more than 10-15 words)."""
+
+class SceneScout:
+    def __init__(self):
+        self.client = get_gemini_client()
+    
+    @acached
+    async def deconstruct_summary(self, summary: str) -> List[str]:
+        """Deconstruct story summary into key plot points"""
+        
+        logger.debug("SceneScout: Deconstructing summary: %s", summary)
+        
+        prompt = _DECONSTRUCT_PROMPT_TEMPLATE.format(summary=summary)
+
         try:
             # Use Gemini API to deconstruct the summary
             response = await self.client.generate_text(
@@ -38,32 +69,30 @@ Format your response as a numbered list with clear, descriptive sentences for ea
                 system_message="You are an expert in story structure and narrative development."
             )
             
-            # Parse the response into a list of plot points
-            plot_points = []
-            lines = response.strip().split('\n')
-            for line in lines:
-                line = line.strip()
-                if line and (line[0].isdigit() or line.startswith('-') or line.startswith('*')):
-                    # Remove numbering/bullets and clean up
-                    cleaned_line = line.lstrip('0123456789.-* ').strip()
-                    if len(cleaned_line) > 10:  # Only include substantial lines
-                        plot_points.append(cleaned_line)
+            # Parse the numbered list into plot points, keeping only substantial items
+            plot_points = [
+                match.group(1)
+                for match in _LIST_ITEM_RE.finditer(response)
+                if len(match.group(1)) > 10
+            ]
             
             # If we didn't get enough plot points, fall back to simple approach
             if len(plot_points) < 3:
                 plot_points = self._generate_mock_plot_points(summary)
             
-            print(f"Generated {len(plot_points)} plot points")
+            logger.debug("Generated %s plot points", len(plot_points))
             return plot_points
             
         except Exception as e:
-            print(f"Gemini API failed in SceneScout deconstruction: {str(e)}")
+            logger.warning("Gemini API failed in SceneScout deconstruction: %s", e)
             # Fallback to mock implementation
             return self._generate_mock_plot_points(summary)
     
     def _generate_mock_plot_points(self, summary: str) -> List[str]:
         """Generate mock plot points when API is unavailable"""
-        if "magical powers" in summary.lower() and "birthday" in summary.lower():
+        mark_fallback()
+        hits = {match.group().lower() for match in _PLOT_KEYWORDS_RE.finditer(summary)}
+        if "magical powers" in hits and "birthday" in hits:
             return [
                 "A young woman wakes up on her 18th birthday feeling strange and different",
                 "She discovers she has magical powers when objects start moving around her",
@@ -82,21 +111,13 @@ Format your response as a numbered list with clear, descriptive sentences for ea
     async def generate_search_query(self, plot_point: str, genre: str, chapter_brief: str) -> str:
         """Generate a search query to find human-written content for this plot point"""
         
-        print(f"SceneScout: Generating search query for: {plot_point}")
+        logger.debug("SceneScout: Generating search query for: %s", plot_point)
         
-        prompt = f"""As a research assistant, generate a specific search query to find human-written descriptive content for this plot point.
-
-PLOT POINT: {plot_point}
-GENRE: {genre}
-CHAPTER BRIEF CONTEXT: {chapter_brief[:200]}...
-
-Requirements:
-- Create a search query that would find descriptive passages from existing literature
-- Focus on finding authentic, human-written descriptions that could inspire this scene
-- The query should be specific enough to find relevant content but broad enough to find multiple sources
-- Include genre-specific terms when appropriate
-
-Format your response as a single search query string (no more than 10-15 words)."""
+        prompt = _SEARCH_QUERY_PROMPT_TEMPLATE.format(
+            plot_point=plot_point,
+            genre=genre,
+            chapter_brief=chapter_brief[:200]
+        )
 
         try:
             # Use Gemini API to generate search query
@@ -114,19 +135,30 @@ Format your response as a single search query string (no more than 10-15 words).
             if len(search_query) < 10:
                 search_query = self._generate_mock_search_query(plot_point, genre)
             
-            print(f"Generated search query: {search_query}")
+            logger.debug("Generated search query: %s", search_query)
             return search_query
             
         except Exception as e:
-            print(f"Gemini API failed in SceneScout search query: {str(e)}")
+            logger.warning("Gemini API failed in SceneScout search query: %s", e)
             # Fallback to mock implementation
             return self._generate_mock_search_query(plot_point, genre)
     
+    async def generate_search_queries(self, plot_points: List[str], genre: str, chapter_brief: str) -> List[str]:
+        """Generate search queries for several plot points concurrently, preserving input order"""
+        
+        # The shared client bounds how many of these hit the API at once
+        return list(await asyncio.gather(*(
+            self.generate_search_query(plot_point, genre, chapter_brief)
+            for plot_point in plot_points
+        )))
+    
     def _generate_mock_search_query(self, plot_point: str, genre: str) -> str:
         """Generate mock search query when API is unavailable"""
-        if "magical powers" in plot_point.lower():
+        mark_fallback()
+        plot_point_lower = plot_point.lower()
+        if "magical powers" in plot_point_lower:
             return f"{genre} discovering magical abilities descriptive scene"
-        elif "birthday" in plot_point.lower():
+        elif "birthday" in plot_point_lower:
             return f"{genre} 18th birthday transformation descriptive passage"
         else:
             return f"{genre} {plot_point[:50]} descriptive narrative"
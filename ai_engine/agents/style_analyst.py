@@ -6,56 +6,37 @@
 
 
 
+import logging
 import os
 import asyncio
-import httpx
-from database.db_manager import DatabaseManager
+import re
+from collections import OrderedDict
+from typing import Dict
+from database.db_manager import get_db_manager
+from utils.fallback import mark_fallback, track_fallbacks
 from utils.gemini_client import get_gemini_client
 
-class StyleAnalyst:
-    def __init__(self):
-        self.client = get_gemini_client()
-        self.db_manager = DatabaseManager()
-    
-    async def research_genre(self, genre: str) -> str:
-        """Research writing style for the specified genre"""
-        
-        print(f"StyleAnalyst: Researching style guide for {genre}")
-        
-        # First check if we have a cached style guide
-        cached_guide = await self._get_cached_style_guide(genre)
-        if cached_guide:
-            print(f"Using cached style guide for {genre}")
-            return cached_guide
-        
-        # Generate new style guide using Gemini API
-        try:
-            style_guide = await self._create_style_guide_with_gemini(genre)
-            formatted_guide = self._format_style_guide(style_guide)
-            
-            # Cache the style guide for future use
-            await self._cache_style_guide(genre, formatted_guide)
-            
-            return formatted_guide
-            
-        except Exception as e:
-            print(f"Gemini API failed in StyleAnalyst: {str(e)}")
-            # Fallback to mock implementation
-            return self._get_mock_style_guide(genre)
-    
-    async def _create_style_guide_with_gemini(self, genre: str) -> dict:
-        """Create comprehensive style guide using Gemini API"""
-        
-        prompt = f"""You are a StyleAnalyst AI agent. Create a comprehensive style guide for writing in the {genre} genre.
+logger = logging.getLogger(__name__)
 
-CORE PHILOSOPHY: You are analyzing existing styles, NOT creating new ones. Base your guide on established conventions.
+# Genres are a small key space, so the in-process cache rarely needs to evict
+_MEM_CACHE_SIZE = 64
+
+# A section header is a short line naming one of the guide's sections, optionally numbered or in markdown
+_SECTION_RE = re.compile(
+    r"^[ \t]*(?:#+[ \t]*)?(?:\d+[.)]?[ \t]*)?\**[ \t]*[A-Za-z &/]*?(STYLE|TONE|TROPE|TECHNIQUE|QUALITY)[A-Za-z &/]*\**[ \t]*:?\**[ \t]*$",
+    re.M | re.I
+)
+
+# The instructions don't depend on the genre and come first, so every request shares the same
+# prompt prefix for provider-side prompt caching; the genre is the only varying part, at the end
+_PROMPT_TEMPLATE = """You are a StyleAnalyst AI agent. Create a comprehensive style guide for writing in the genre named at the end of this prompt.
 
-Genre: {genre}
+CORE PHILOSOPHY: You are analyzing existing styles, NOT creating new ones. Base your guide on established conventions.
 
 Create a detailed style guide including:
 
 1. STYLE DESCRIPTION
-   - Key characteristics of {genre} writing
+   - Key characteristics of writing in this genre
    - What makes it distinctive
    - Essential elements that define the genre
 
@@ -76,20 +57,128 @@ Create a detailed style guide including:
    - Dialogue style (if applicable)
 
 5. QUALITY STANDARDS
-   - What makes {genre} writing effective
+   - What makes writing in this genre effective
    - Common pitfalls to avoid
    - Benchmarks for good writing in this genre
 
-Be specific and detailed. This guide will be used by other AI agents to maintain authentic {genre} style.
+Be specific and detailed. This guide will be used by other AI agents to maintain an authentic genre style.
+
+Format your response as a structured guide with clear sections.
+
+Genre: {genre}"""
 
-Format your response as a structured guide with clear sections."""
+_SYSTEM_MESSAGE = "You are a StyleAnalyst AI that creates comprehensive style guides for genre fiction."
+
+# Formatted guide handed to the other agents
+_GUIDE_TEMPLATE = """GENRE STYLE GUIDE: %s
+
+TONE GUIDELINES:
+%s
+
+CONVENTIONS AND TROPES:
+%s
+
+WRITING TECHNIQUES:
+%s"""
+
+# Header keyword -> key used by the rest of the pipeline
+_SECTION_KEYS = {
+    'STYLE': 'style_description',
+    'TONE': 'tone_guidelines',
+    'TROPE': 'common_tropes',
+    'TECHNIQUE': 'writing_tips',
+    'QUALITY': 'quality_standards'
+}
+
+def _normalize_genre(genre: str) -> str:
+    """Key a genre case- and whitespace-insensitively"""
+    return genre.lower().strip()
+
+class StyleAnalyst:
+    def __init__(self):
+        self.client = get_gemini_client()
+        self.db_manager = get_db_manager()
+        # Formatted guides by normalized genre, checked before the database
+        self._mem_cache: "OrderedDict[str, str]" = OrderedDict()
+        # Genres currently being researched, so concurrent requests for one genre share a single lookup
+        self._inflight: Dict[str, asyncio.Future] = {}
+    
+    async def research_genre(self, genre: str) -> str:
+        """Research writing style for the specified genre"""
+        
+        logger.debug("StyleAnalyst: Researching style guide for %s", genre)
+        
+        # One key for the in-process cache, in-flight lookups and the database, so "Fantasy" and
+        # "fantasy" share a single stored guide
+        genre = _normalize_genre(genre)
+        cached_guide = self._mem_cache.get(genre)
+        if cached_guide:
+            self._mem_cache.move_to_end(genre)
+            return cached_guide
+        
+        task = self._inflight.get(genre)
+        if task is None:
+            task = asyncio.ensure_future(self._research_uncached(genre))
+            self._inflight[genre] = task
+            task.add_done_callback(lambda _: self._inflight.pop(genre, None))
+        
+        # Shield so one cancelled caller doesn't cancel the lookup for everyone else
+        return await asyncio.shield(task)
+    
+    async def warm_cache(self) -> None:
+        """Load every stored style guide into the in-process cache in one query"""
+        try:
+            style_guides = await self.db_manager.load_all_style_guides()
+        except Exception as e:
+            logger.warning("Error prewarming style guide cache: %s", e)
+            return
+        
+        for genre, style_guide in style_guides.items():
+            self._remember(_normalize_genre(genre), self._format_style_guide(style_guide))
+        logger.debug("StyleAnalyst: Prewarmed %s style guides", len(style_guides))
+    
+    async def _research_uncached(self, genre: str) -> str:
+        """Look the (normalized) genre's guide up in the database, generating and storing it on a miss"""
+        
+        # First check if we have a cached style guide
+        cached_guide = await self._get_cached_style_guide(genre)
+        if cached_guide:
+            logger.debug("Using cached style guide for %s", genre)
+            self._remember(genre, cached_guide)
+            return cached_guide
+        
+        # Generate new style guide using Gemini API
+        try:
+            with track_fallbacks() as fallbacks:
+                style_guide = await self._create_style_guide_with_gemini(genre)
+            formatted_guide = self._format_style_guide(style_guide)
+            
+            # Cache the style guide for future use, unless it came from a fallback or is missing sections;
+            # either would otherwise be served for this genre from then on
+            if fallbacks.used or not all(style_guide.values()):
+                logger.debug("Not caching incomplete style guide for %s", genre)
+                return formatted_guide
+            await self._cache_style_guide(genre, style_guide)
+            self._remember(genre, formatted_guide)
+            
+            return formatted_guide
+            
+        except Exception as e:
+            logger.warning("Gemini API failed in StyleAnalyst: %s", e)
+            # Fallback to mock implementation
+            return self._get_mock_style_guide(genre)
+    
+    async def _create_style_guide_with_gemini(self, genre: str) -> dict:
+        """Create comprehensive style guide using Gemini API"""
+        
+        prompt = _PROMPT_TEMPLATE.format(genre=genre)
 
         try:
             response = await self.client.generate_text(
                 prompt=prompt,
                 max_tokens=1500,
                 temperature=0.3,
-                system_message=f"You are a StyleAnalyst AI that creates comprehensive style guides for {genre} writing."
+                system_message=_SYSTEM_MESSAGE
             )
             
             # Parse the response into structured format
@@ -103,59 +192,35 @@ Format your response as a structured guide with clear sections."""
             }
             
         except Exception as e:
-            print(f"Style guide creation with Gemini failed: {e}")
+            logger.warning("Style guide creation with Gemini failed: %s", e)
             return self._get_default_style_guide(genre)
     
-    async def _research_genre_style(self, genre: str) -> dict:
-        """Research genre style by analyzing examples and guides"""
-        
-        # Generate research queries for this genre
-        research_queries = [
-            f"{genre.replace('_', ' ')} writing style guide techniques",
-            f"how to write {genre.replace('_', ' ')} fiction style",
-            f"{genre.replace('_', ' ')} genre conventions writing",
-            f"{genre.replace('_', ' ')} literary techniques examples"
-        ]
-        
-        style_research = {
-            'descriptions': [],
-            'techniques': [],
-            'conventions': [],
-            'examples': []
-        }
-        
-        for query in research_queries:
-            try:
-                # This would normally call the scraper service
-                # For now, we'll simulate the research
-                print(f"Researching: {query}")
-                # In a real implementation, this would scrape actual content
-                await asyncio.sleep(1)  # Simulate research time
-                
-            except Exception as e:
-                print(f"Research query failed: {e}")
-                continue
-        
-        return style_research
+    def _remember(self, mem_key: str, formatted_guide: str) -> None:
+        """Keep a formatted guide in the in-process LRU"""
+        self._mem_cache[mem_key] = formatted_guide
+        self._mem_cache.move_to_end(mem_key)
+        if len(self._mem_cache) > _MEM_CACHE_SIZE:
+            self._mem_cache.popitem(last=False)
     
     async def _get_cached_style_guide(self, genre: str) -> str:
         """Check if we have a cached style guide for this genre"""
         try:
-            # This would normally check the database
-            # For now, return None to always generate new guides
-            return None
+            style_guide = await self.db_manager.get_style_guide(genre)
+            return self._format_style_guide(style_guide) if style_guide else None
         except Exception as e:
-            print(f"Error checking cached style guide: {e}")
+            logger.warning("Error checking cached style guide: %s", e)
             return None
     
-    async def _cache_style_guide(self, genre: str, style_guide: str) -> None:
+    async def _cache_style_guide(self, genre: str, style_guide: dict) -> None:
         """Cache the style guide for future use"""
+        # Mock guides must not outlive test mode and shadow real ones once an API key is configured
+        if self.client.is_test_mode:
+            return
         try:
-            # This would normally save to database
-            # For now, just log that we're caching
-            print(f"Caching style guide for {genre}")
+            logger.debug("Caching style guide for %s", genre)
+            await self.db_manager.store_style_guide(genre, style_guide)
         except Exception as e:
-            print(f"Error caching style guide: {e}")
+            logger.warning("Error caching style guide: %s", e)
     
     def _get_mock_style_guide(self, genre: str) -> str:
         """Fallback mock style guide when API is unavailable"""
@@ -179,32 +244,20 @@ Format your response as a structured guide with clear sections."""
     def _parse_style_guide(self, guide_text: str) -> dict:
         """Parse the generated style guide into structured sections"""
         sections = {}
-        current_section = None
-        current_content = []
-        
-        lines = guide_text.split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Look for section headers
-            if any(keyword in line.upper() for keyword in ['STYLE', 'TONE', 'TROPE', 'TECHNIQUE', 'QUALITY']):
-                if current_section and current_content:
-                    sections[current_section] = ' '.join(current_content)
-                current_section = line.lower().replace(':', '').replace(' ', '_')
-                current_content = []
-            elif current_section:
-                current_content.append(line)
+        headers = list(_SECTION_RE.finditer(guide_text))
         
-        # Add the last section
-        if current_section and current_content:
-            sections[current_section] = ' '.join(current_content)
+        # Each section's body runs from the end of its header to the start of the next one
+        for header, next_header in zip(headers, headers[1:] + [None]):
+            body = guide_text[header.end():next_header.start() if next_header else len(guide_text)]
+            content = ' '.join(body.split())
+            if content:
+                sections[_SECTION_KEYS[header.group(1).upper()]] = content
         
         return sections
     
     def _get_default_style_guide(self, genre: str) -> dict:
         """Fallback style guide for when AI generation fails"""
+        mark_fallback()
         return {
             'style_description': f'Authentic {genre.replace("_", " ")} writing style with rich descriptive language',
             'tone_guidelines': 'Maintain consistent tone appropriate to the genre and story context',
@@ -214,18 +267,12 @@ Format your response as a structured guide with clear sections."""
     
     def _format_style_guide(self, style_guide: dict) -> str:
         """Format style guide for use by other agents"""
-        return f"""
-GENRE STYLE GUIDE: {style_guide.get('style_description', '')}
-
-TONE GUIDELINES:
-{style_guide.get('tone_guidelines', '')}
-
-CONVENTIONS AND TROPES:
-{style_guide.get('common_tropes', '')}
-
-WRITING TECHNIQUES:
-{style_guide.get('writing_tips', '')}
-""".strip()
+        return _GUIDE_TEMPLATE % (
+            style_guide.get('style_description', ''),
+            style_guide.get('tone_guidelines', ''),
+            style_guide.get('common_tropes', ''),
+            style_guide.get('writing_tips', '')
+        )
 
 
 
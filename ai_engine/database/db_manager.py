@@ -4,303 +4,372 @@
 import sqlite3
 import json
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 from datetime import datetime
 
+# Bump when _SCHEMA_SQL changes so existing databases pick up the new DDL
+SCHEMA_VERSION = 3
+
+_SCHEMA_SQL = """
+    -- Characters table
+    CREATE TABLE IF NOT EXISTS characters (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        description TEXT,
+        backstory TEXT,
+        personality TEXT,
+        first_appearance TEXT,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- Lore table
+    CREATE TABLE IF NOT EXISTS lore (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category TEXT NOT NULL,
+        name TEXT NOT NULL,
+        description TEXT,
+        significance TEXT,
+        first_mentioned TEXT,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- Style guides table
+    CREATE TABLE IF NOT EXISTS style_guides (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        genre TEXT NOT NULL UNIQUE,
+        style_description TEXT,
+        tone_guidelines TEXT,
+        common_tropes TEXT,
+        writing_tips TEXT,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- Chapter history table
+    CREATE TABLE IF NOT EXISTS chapter_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        summary TEXT,
+        genre TEXT,
+        chapter_content TEXT,
+        chapter_number INTEGER,
+        previous_chapter_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (previous_chapter_id) REFERENCES chapter_history (id)
+    );
+    
+    -- Indices for character lookups, lore lookups and newest-first chapter listing
+    CREATE INDEX IF NOT EXISTS idx_characters_name ON characters (name COLLATE NOCASE);
+    CREATE INDEX IF NOT EXISTS idx_lore_name ON lore (category, name);
+    CREATE INDEX IF NOT EXISTS idx_chapter_history_created ON chapter_history (created_at DESC);
+    
+    -- Scraped research content, keyed by a hash of the normalized search query
+    CREATE TABLE IF NOT EXISTS scrape_cache (
+        query_key TEXT PRIMARY KEY,
+        content TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_scrape_cache_created ON scrape_cache (created_at);
+"""
+
+# Read queries are fixed strings so the per-connection statement cache reuses their prepared statements
+_SELECT_STYLE_GUIDE_SQL = """
+    SELECT style_description, tone_guidelines, common_tropes, writing_tips
+    FROM style_guides
+    WHERE genre = ?
+"""
+
+_SELECT_ALL_STYLE_GUIDES_SQL = """
+    SELECT genre, style_description, tone_guidelines, common_tropes, writing_tips
+    FROM style_guides
+"""
+
+_SELECT_SCRAPED_CONTENT_SQL = """
+    SELECT content, created_at
+    FROM scrape_cache
+    WHERE query_key = ? AND created_at >= ?
+"""
+
+_SELECT_CHARACTER_EXACT_SQL = """
+    SELECT name, description, backstory, personality, first_appearance
+    FROM characters
+    WHERE name = ? COLLATE NOCASE
+    LIMIT 1
+"""
+
+_SELECT_CHARACTER_LIKE_SQL = """
+    SELECT name, description, backstory, personality, first_appearance
+    FROM characters
+    WHERE name LIKE ?
+"""
+
+# Every chapter query returns the same columns, which sqlite3.Row maps to the same dict keys
+_SELECT_CHAPTER_SQL = """
+    SELECT id, summary, genre, chapter_content, chapter_number, previous_chapter_id, created_at
+    FROM chapter_history
+"""
+
+_SELECT_LATEST_CHAPTER_SQL = _SELECT_CHAPTER_SQL + "ORDER BY created_at DESC LIMIT 1"
+
+_SELECT_CHAPTER_BY_ID_SQL = _SELECT_CHAPTER_SQL + "WHERE id = ?"
+
+_SELECT_CHAPTERS_SQL = _SELECT_CHAPTER_SQL + "ORDER BY created_at DESC"
+
 class DatabaseManager:
     def __init__(self, db_path: str = "writing_assistant.db"):
         self.db_path = db_path
+        # One persistent connection per executor thread instead of a connect/close per query
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._read_workers = 4
+        self._start_executors()
         self.init_database()
     
-    def init_database(self):
-        """Initialize the database with required tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _start_executors(self):
+        """Create the writer thread and reader pool"""
+        # SQLite serializes writers, so one writer thread avoids lock contention; WAL lets reads proceed in parallel
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._read_executor = ThreadPoolExecutor(max_workers=self._read_workers, thread_name_prefix="sqlite-reader")
+        self._closed = False
+    
+    def _conn(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening and tuning it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+            # WAL lets readers run alongside the writer; NORMAL sync is durable enough under WAL
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-20000")
+            # Rows convert straight to dicts keyed by column name
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    async def _run_write(self, fn):
+        """Run a blocking write on the single writer thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._write_executor, fn)
+    
+    async def _run_read(self, fn):
+        """Run a blocking read on the reader pool"""
+        return await asyncio.get_running_loop().run_in_executor(self._read_executor, fn)
+    
+    async def connect(self):
+        """Open the writer's and every reader's connection up front so no request pays for it"""
+        # The manager is a process-wide singleton, so an app started again after shutdown reuses it
+        if self._closed:
+            self._start_executors()
         
-        # Characters table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS characters (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT,
-                backstory TEXT,
-                personality TEXT,
-                first_appearance TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        # Each reader waits at the barrier until all have started, forcing one connection per pool thread
+        barrier = threading.Barrier(self._read_workers)
         
-        # Lore table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS lore (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                category TEXT NOT NULL,
-                name TEXT NOT NULL,
-                description TEXT,
-                significance TEXT,
-                first_mentioned TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        def _open_reader():
+            self._conn()
+            barrier.wait(timeout=5)
         
-        # Style guides table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS style_guides (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                genre TEXT NOT NULL UNIQUE,
-                style_description TEXT,
-                tone_guidelines TEXT,
-                common_tropes TEXT,
-                writing_tips TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        await asyncio.gather(
+            self._run_write(self._conn),
+            *(self._run_read(_open_reader) for _ in range(self._read_workers))
+        )
+    
+    def close(self, wait: bool = True):
+        """Shut down the executors and close every pooled connection; connect() starts them again"""
+        self._closed = True
+        self._write_executor.shutdown(wait=wait)
+        self._read_executor.shutdown(wait=wait)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+    
+    def __del__(self):
+        try:
+            # A finalizer can run on one of the executor threads, where waiting for the pool would deadlock
+            self.close(wait=False)
+        except Exception:
+            pass
+    
+    def init_database(self):
+        """Initialize the database with required tables"""
+        conn = self._conn()
         
-        # Chapter history table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS chapter_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                summary TEXT,
-                genre TEXT,
-                chapter_content TEXT,
-                chapter_number INTEGER,
-                previous_chapter_id INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (previous_chapter_id) REFERENCES chapter_history (id)
-            )
-        ''')
+        # Already at the current schema, so skip re-running the DDL
+        if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+            return
         
-        conn.commit()
-        conn.close()
+        conn.executescript(_SCHEMA_SQL)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     
     async def store_characters(self, characters: List[Dict[str, Any]]):
         """Store character information in the database"""
         def _store():
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            for character in characters:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO characters 
-                    (name, description, backstory, personality, first_appearance)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
+            rows = [
+                (
                     character.get('name'),
                     character.get('description'),
                     character.get('backstory'),
                     character.get('personality'),
                     character.get('first_appearance')
-                ))
+                )
+                for character in characters
+            ]
             
-            conn.commit()
-            conn.close()
+            # One prepared statement bound for every row, in a single transaction
+            with self._conn() as conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO characters 
+                    (name, description, backstory, personality, first_appearance)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', rows)
         
-        await asyncio.get_event_loop().run_in_executor(None, _store)
+        await self._run_write(_store)
     
     async def store_lore(self, lore_entries: List[Dict[str, Any]]):
         """Store lore information in the database"""
         def _store():
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            for lore in lore_entries:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO lore 
-                    (category, name, description, significance, first_mentioned)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
+            rows = [
+                (
                     lore.get('category'),
                     lore.get('name'),
                     lore.get('description'),
                     lore.get('significance'),
                     lore.get('first_mentioned')
-                ))
+                )
+                for lore in lore_entries
+            ]
             
-            conn.commit()
-            conn.close()
+            # One prepared statement bound for every row, in a single transaction
+            with self._conn() as conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO lore 
+                    (category, name, description, significance, first_mentioned)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', rows)
         
-        await asyncio.get_event_loop().run_in_executor(None, _store)
+        await self._run_write(_store)
     
     async def get_style_guide(self, genre: str) -> Dict[str, Any]:
         """Get style guide for a specific genre"""
         def _get():
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT style_description, tone_guidelines, common_tropes, writing_tips
-                FROM style_guides
-                WHERE genre = ?
-            ''', (genre,))
-            
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return {
-                    'style_description': result[0],
-                    'tone_guidelines': result[1],
-                    'common_tropes': result[2],
-                    'writing_tips': result[3]
-                }
-            return None
+            result = self._conn().execute(_SELECT_STYLE_GUIDE_SQL, (genre,)).fetchone()
+            return dict(result) if result else None
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run_read(_get)
+    
+    async def load_all_style_guides(self) -> Dict[str, Dict[str, Any]]:
+        """Get every stored style guide, keyed by genre"""
+        def _list():
+            return {row['genre']: dict(row) for row in self._conn().execute(_SELECT_ALL_STYLE_GUIDES_SQL)}
+        
+        return await self._run_read(_list)
     
     async def store_style_guide(self, genre: str, style_guide: Dict[str, Any]):
         """Store style guide for a specific genre"""
         def _store():
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO style_guides 
-                (genre, style_description, tone_guidelines, common_tropes, writing_tips)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                genre,
-                style_guide.get('style_description'),
-                style_guide.get('tone_guidelines'),
-                style_guide.get('common_tropes'),
-                style_guide.get('writing_tips')
-            ))
-            
-            conn.commit()
-            conn.close()
+            # Rolled back on failure, so a bad write can't leave the shared writer connection mid-transaction
+            with self._conn() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO style_guides 
+                    (genre, style_description, tone_guidelines, common_tropes, writing_tips)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (
+                    genre,
+                    style_guide.get('style_description'),
+                    style_guide.get('tone_guidelines'),
+                    style_guide.get('common_tropes'),
+                    style_guide.get('writing_tips')
+                ))
         
-        await asyncio.get_event_loop().run_in_executor(None, _store)
+        await self._run_write(_store)
+    
+    async def get_scraped_content(self, query_key: str, oldest_allowed: float) -> Dict[str, Any]:
+        """Get cached scraper output for a query key if it is newer than oldest_allowed"""
+        def _get():
+            result = self._conn().execute(_SELECT_SCRAPED_CONTENT_SQL, (query_key, oldest_allowed)).fetchone()
+            return dict(result) if result else None
+        
+        return await self._run_read(_get)
+    
+    async def store_scraped_content(self, query_key: str, content: str, created_at: float, oldest_allowed: float):
+        """Cache scraper output for a query key, dropping entries older than oldest_allowed"""
+        def _store():
+            with self._conn() as conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO scrape_cache (query_key, content, created_at)
+                    VALUES (?, ?, ?)
+                ''', (query_key, content, created_at))
+                # Expired rows are never served again, so prune them instead of keeping their text forever
+                conn.execute("DELETE FROM scrape_cache WHERE created_at < ?", (oldest_allowed,))
+        
+        await self._run_write(_store)
     
     async def get_character_info(self, character_name: str) -> Dict[str, Any]:
         """Get information about a specific character"""
         def _get():
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            conn = self._conn()
             
-            cursor.execute('''
-                SELECT name, description, backstory, personality, first_appearance
-                FROM characters
-                WHERE name LIKE ?
-            ''', (f'%{character_name}%',))
+            # Exact (case-insensitive) names are an index probe; only partial names need the full scan
+            result = conn.execute(_SELECT_CHARACTER_EXACT_SQL, (character_name,)).fetchone()
             
-            result = cursor.fetchone()
-            conn.close()
+            if result is None:
+                result = conn.execute(_SELECT_CHARACTER_LIKE_SQL, (f'%{character_name}%',)).fetchone()
             
-            if result:
-                return {
-                    'name': result[0],
-                    'description': result[1],
-                    'backstory': result[2],
-                    'personality': result[3],
-                    'first_appearance': result[4]
-                }
-            return None
+            return dict(result) if result else None
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run_read(_get)
     
-    async def store_chapter(self, summary: str, genre: str, chapter_content: str, chapter_number: int = 1, previous_chapter_id: int = None):
-        """Store generated chapter in history"""
+    async def store_chapter(self, summary: str, genre: str, chapter_content: str, chapter_number: int = 1, previous_chapter_id: int = None) -> int:
+        """Store generated chapter in history and return its ID"""
         def _store():
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO chapter_history (summary, genre, chapter_content, chapter_number, previous_chapter_id)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (summary, genre, chapter_content, chapter_number, previous_chapter_id))
+            with self._conn() as conn:
+                cursor = conn.execute('''
+                    INSERT INTO chapter_history (summary, genre, chapter_content, chapter_number, previous_chapter_id)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (summary, genre, chapter_content, chapter_number, previous_chapter_id))
             
-            conn.commit()
-            conn.close()
+            # lastrowid belongs to this connection's insert, so concurrent requests can't mix up IDs
+            return cursor.lastrowid
         
-        await asyncio.get_event_loop().run_in_executor(None, _store)
+        return await self._run_write(_store)
     
     async def get_latest_chapter(self) -> Dict[str, Any]:
         """Get the most recently created chapter"""
         def _get():
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, summary, genre, chapter_content, chapter_number, previous_chapter_id, created_at
-                FROM chapter_history
-                ORDER BY created_at DESC
-                LIMIT 1
-            ''')
-            
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return {
-                    'id': result[0],
-                    'summary': result[1],
-                    'genre': result[2],
-                    'chapter_content': result[3],
-                    'chapter_number': result[4],
-                    'previous_chapter_id': result[5],
-                    'created_at': result[6]
-                }
-            return None
+            result = self._conn().execute(_SELECT_LATEST_CHAPTER_SQL).fetchone()
+            return dict(result) if result else None
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run_read(_get)
     
     async def get_chapter_by_id(self, chapter_id: int) -> Dict[str, Any]:
         """Get a specific chapter by ID"""
         def _get():
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, summary, genre, chapter_content, chapter_number, previous_chapter_id, created_at
-                FROM chapter_history
-                WHERE id = ?
-            ''', (chapter_id,))
-            
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result:
-                return {
-                    'id': result[0],
-                    'summary': result[1],
-                    'genre': result[2],
-                    'chapter_content': result[3],
-                    'chapter_number': result[4],
-                    'previous_chapter_id': result[5],
-                    'created_at': result[6]
-                }
-            return None
+            result = self._conn().execute(_SELECT_CHAPTER_BY_ID_SQL, (chapter_id,)).fetchone()
+            return dict(result) if result else None
         
-        return await asyncio.get_event_loop().run_in_executor(None, _get)
+        return await self._run_read(_get)
+    
+    async def ping(self) -> None:
+        """Run a trivial query, raising if the database can't be read"""
+        await self._run_read(lambda: self._conn().execute("SELECT 1").fetchone())
     
     async def list_chapters(self) -> List[Dict[str, Any]]:
         """List all chapters"""
         def _list():
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, summary, genre, chapter_content, chapter_number, previous_chapter_id, created_at
-                FROM chapter_history
-                ORDER BY created_at DESC
-            ''')
-            
-            results = cursor.fetchall()
-            conn.close()
-            
-            chapters = []
-            for result in results:
-                chapters.append({
-                    'id': result[0],
-                    'summary': result[1],
-                    'genre': result[2],
-                    'chapter_content': result[3],
-                    'chapter_number': result[4],
-                    'previous_chapter_id': result[5],
-                    'created_at': result[6]
-                })
-            
-            return chapters
+            return [dict(row) for row in self._conn().execute(_SELECT_CHAPTERS_SQL)]
         
-        return await asyncio.get_event_loop().run_in_executor(None, _list)
+        return await self._run_read(_list)
 
+# Create a singleton instance so the app and agents share one set of connections and one writer thread
+db_manager = None
 
+def get_db_manager():
+    """Get or create the singleton DatabaseManager instance"""
+    global db_manager
+    if db_manager is None:
+        db_manager = DatabaseManager()
+    return db_manager
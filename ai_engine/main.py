@@ -1,14 +1,34 @@
 
 
 import os
+import json
+import time
+import queue
+import atexit
 import asyncio
+import logging
+import logging.handlers
 import httpx
-from typing import List, Dict, Any, Optional
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Tuple
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
+# Chapter responses carry the full chapter text plus character and lore lists, which orjson encodes much faster
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+    _json_loads = orjson.loads
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:  # orjson is optional; the stdlib produces the same JSON, just slower
+    from fastapi.responses import JSONResponse as DefaultResponse
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
 # Import agents
 import sys
 import os
@@ -23,11 +43,56 @@ from agents.character_extractor import CharacterExtractor
 from agents.lore_master import LoreMaster
 
 # Import database
-from database.db_manager import DatabaseManager
+from database.db_manager import get_db_manager
+from utils.gemini_client import get_gemini_client
+from utils.scrape_cache import get_scrape_cache
+
+from pipeline import ChapterPipeline, EventCallback
 
 load_dotenv()
 
-app = FastAPI(title="AI Research Assistant for Writers", version="1.0.0")
+# Agents log through module loggers; progress messages are DEBUG so they cost nothing unless enabled.
+# Records go through a queue to a background thread, so writing to stdout never blocks the event loop
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+# The listener's handler applies the real format; this only merges args into the message
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), handlers=[_queue_handler])
+_log_listener.start()
+atexit.register(_log_listener.stop)
+# httpx logs every outgoing request at INFO, which would add a log line per API/scraper call
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+logger = logging.getLogger("ai_engine")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own the shared HTTP pool and warm caches for the lifetime of the app"""
+    # One pooled client for scraper and health calls instead of a new connection per call
+    app.state.http = httpx.AsyncClient(
+        timeout=30.0,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    )
+    # Open the SQLite connection pool now rather than on the first requests that touch each thread
+    await db_manager.connect()
+    # Load stored style guides so the first request for a known genre skips the database
+    await style_analyst.warm_cache()
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+        await get_gemini_client().aclose()
+        db_manager.close()
+
+app = FastAPI(
+    title="AI Research Assistant for Writers",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=DefaultResponse
+)
 
 # CORS configuration for frontend
 app.add_middleware(
@@ -69,216 +134,267 @@ character_extractor = CharacterExtractor()
 lore_master = LoreMaster()
 
 # Initialize database
-db_manager = DatabaseManager()
+db_manager = get_db_manager()
+scrape_cache = get_scrape_cache()
 
 # Configuration
 SCRAPER_SERVICE_URL = os.getenv("SCRAPER_SERVICE_URL", "http://localhost:3002")
 FALLBACK_SCRAPER_URL = os.getenv("FALLBACK_SCRAPER_URL", "http://localhost:3003")
 
+# Chapter pipeline; scrape_content is looked up lazily since it is defined further down
+chapter_pipeline = ChapterPipeline(
+    intent_analyst,
+    scene_scout,
+    style_analyst,
+    master_weaver,
+    correction_polish,
+    character_extractor,
+    lore_master,
+    lambda query: scrape_content(query)
+)
+
 @app.get("/")
 async def root():
     return {"message": "AI Research Assistant for Writers", "status": "running"}
 
+# Load balancers poll /health often, so a result is reused briefly instead of re-probing every time
+_HEALTH_TTL = 2.0
+_HEALTH_PROBE_TIMEOUT = 1.0
+_health_cache: Dict[str, Any] = {"checked_at": 0.0, "response": None}
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Check health of all services"""
+    if _health_cache["response"] is not None and time.monotonic() - _health_cache["checked_at"] < _HEALTH_TTL:
+        return _health_cache["response"]
+    
+    # Probe everything at once so the check takes as long as the slowest probe, not their sum
+    database, scraper_service, fallback_scraper = await asyncio.gather(
+        probe_database(),
+        probe_service(SCRAPER_SERVICE_URL),
+        probe_service(FALLBACK_SCRAPER_URL)
+    )
     services = {
         "ai_engine": "healthy",
-        "database": "healthy"
+        "database": database,
+        "scraper_service": scraper_service,
+        "fallback_scraper": fallback_scraper
     }
     
-    # Check scraper service
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{SCRAPER_SERVICE_URL}/health", timeout=5.0)
-            if response.status_code == 200:
-                services["scraper_service"] = "healthy"
-            else:
-                services["scraper_service"] = "unhealthy"
-    except Exception as e:
-        services["scraper_service"] = f"error: {str(e)}"
-    
-    return HealthResponse(
-        status="healthy" if all("healthy" in str(v) for v in services.values()) else "degraded",
+    response = HealthResponse(
+        status="healthy" if all(v == "healthy" for v in services.values()) else "degraded",
         services=services
     )
+    _health_cache["checked_at"] = time.monotonic()
+    _health_cache["response"] = response
+    return response
+
+async def probe_service(base_url: str) -> str:
+    """Report whether a scraper service answers its health endpoint"""
+    try:
+        response = await app.state.http.get(f"{base_url}/health", timeout=_HEALTH_PROBE_TIMEOUT)
+        return "healthy" if response.status_code == 200 else "unhealthy"
+    except Exception as e:
+        return f"error: {str(e) or type(e).__name__}"
+
+async def probe_database() -> str:
+    """Report whether the database answers a trivial query"""
+    try:
+        await asyncio.wait_for(db_manager.ping(), timeout=_HEALTH_PROBE_TIMEOUT)
+        return "healthy"
+    except Exception as e:
+        return f"error: {str(e) or type(e).__name__}"
 
 @app.post("/generate-chapter", response_model=ChapterResponse)
 async def generate_chapter(request: ChapterRequest):
     """Generate a chapter based on summary and genre"""
     try:
-        print(f"🚀 Starting chapter generation for genre: {request.genre}")
-        
-        # Step 0: Determine chapter number and get previous chapter if needed
-        chapter_number = 1
-        previous_chapter_content = None
+        return await build_chapter(request)
         
-        if request.previous_chapter_id:
-            previous_chapter = await db_manager.get_chapter_by_id(request.previous_chapter_id)
-            if previous_chapter:
-                previous_chapter_content = previous_chapter['chapter_content']
-                chapter_number = previous_chapter['chapter_number'] + 1
-        
-        # Step 1: Intent Analysis
-        print("📋 Step 1: Intent Analysis")
-        chapter_brief = await intent_analyst.analyze_intent(
-            request.summary, 
-            previous_chapter_content,
-            request.genre
-        )
-        print(f"Chapter brief created: {chapter_brief[:100]}...")
-        
-        # Step 2: Scene Scouting
-        print("🗺️ Step 2: Scene Scouting")
-        plot_points = await scene_scout.deconstruct_summary(request.summary)
-        print(f"Generated {len(plot_points)} plot points")
-        
-        # Step 3: Style Analysis
-        print("🎨 Step 3: Style Analysis")
-        style_guide = await style_analyst.research_genre(request.genre)
-        print(f"Style guide retrieved: {style_guide[:100]}...")
-        
-        # Step 4: Master Weaving
-        print("🧵 Step 4: Master Weaving")
-        chapter_sections = []
-        
-        for i, plot_point in enumerate(plot_points):
-            print(f"Weaving plot point {i+1}/{len(plot_points)}: {plot_point[:50]}...")
-            
-            # Generate search query for this plot point
-            search_query = await scene_scout.generate_search_query(plot_point, request.genre, chapter_brief)
-            print(f"Search query: {search_query}")
-            
-            # Scrape content
-            scraped_content = await scrape_content(search_query)
-            print(f"Scraped {len(scraped_content)} characters of content")
-            
-            # Weave plot point with scraped content
-            woven_section = await master_weaver.weave_content(
-                plot_point,
-                scraped_content,
-                style_guide,
-                chapter_brief
-            )
-            chapter_sections.append(woven_section)
-            print(f"Section {i+1} woven successfully")
-        
-        # Combine sections into raw chapter
-        raw_chapter = "\n\n".join(chapter_sections)
-        print(f"Raw chapter created: {len(raw_chapter)} characters")
-        
-        # Step 5: Correction & Polish
-        print("✨ Step 5: Correction & Polish")
-        polished_chapter = await correction_polish.polish_chapter(
-            raw_chapter,
-            style_guide,
-            chapter_brief
-        )
-        print(f"Chapter polished: {len(polished_chapter)} characters")
-        
-        # Step 6: World Building
-        print("🏗️ Step 6: World Building")
-        characters = await character_extractor.extract_characters(polished_chapter)
-        lore = await lore_master.extract_lore(polished_chapter)
-        print(f"Extracted {len(characters)} characters and {len(lore)} lore entries")
-        
-        # Save to database
-        await db_manager.store_chapter(
+    except Exception as e:
+        logger.error("Chapter generation failed: %s", e)
+        raise HTTPException(status_code=500, detail=f"Chapter generation failed: {str(e)}")
+
+@app.post("/generate-chapter/stream")
+async def generate_chapter_stream(request: ChapterRequest):
+    """Generate a chapter, streaming each stage's result as a server-sent event"""
+    events: asyncio.Queue = asyncio.Queue()
+    
+    async def on_event(stage: str, data: Any) -> None:
+        await events.put({"stage": stage, "data": data})
+    
+    async def run() -> None:
+        try:
+            chapter = await build_chapter(request, on_event)
+            await events.put({"stage": "complete", "data": chapter.model_dump()})
+        except Exception as e:
+            logger.error("Chapter generation failed: %s", e)
+            await events.put({"stage": "error", "data": f"Chapter generation failed: {str(e)}"})
+        finally:
+            await events.put(None)
+    
+    async def event_stream():
+        task = asyncio.create_task(run())
+        try:
+            while (event := await events.get()) is not None:
+                yield f"data: {_json_dumps(event)}\n\n"
+        finally:
+            # Stop generating if the client disconnects before the chapter is done
+            task.cancel()
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+async def build_chapter(request: ChapterRequest, on_event: Optional[EventCallback] = None) -> ChapterResponse:
+    """Run the chapter pipeline, store the result and build the response"""
+    logger.info("Starting chapter generation for genre: %s", request.genre)
+    
+    # Step 0: Determine chapter number and get previous chapter if needed
+    chapter_number = 1
+    previous_chapter_content = None
+    
+    if request.previous_chapter_id:
+        previous_chapter = await db_manager.get_chapter_by_id(request.previous_chapter_id)
+        if previous_chapter:
+            previous_chapter_content = previous_chapter['chapter_content']
+            chapter_number = previous_chapter['chapter_number'] + 1
+    
+    # Steps 1-6 run as a dependency graph: intent analysis, scene scouting and style analysis
+    # overlap, plot points are woven concurrently, then the chapter is polished and mined
+    logger.debug("Running chapter pipeline")
+    result = await chapter_pipeline.run(
+        request.summary,
+        request.genre,
+        previous_chapter_content,
+        on_event
+    )
+    polished_chapter = result["content"]
+    style_guide = result["style_guide"]
+    characters = result["characters"]
+    lore = result["lore"]
+    
+    # Save to database and generate the title together; the title doesn't depend on the insert
+    chapter_id, title = await asyncio.gather(
+        db_manager.store_chapter(
             request.summary,
             request.genre,
             polished_chapter,
             chapter_number,
             request.previous_chapter_id
-        )
-        
-        # Get the chapter ID of the newly created chapter
-        latest_chapter = await db_manager.get_latest_chapter()
-        chapter_id = latest_chapter['id']
-        
-        # Generate title
-        title = await generate_title(polished_chapter, request.genre)
-        
-        print("✅ Chapter generation complete!")
-        
-        return ChapterResponse(
-            chapter_id=chapter_id,
-            title=title,
-            content=polished_chapter,
-            word_count=len(polished_chapter.split()),
-            style_guide=style_guide,
-            characters=characters,
-            lore=lore,
-            chapter_number=chapter_number,
-            previous_chapter_id=request.previous_chapter_id
-        )
-        
-    except Exception as e:
-        print(f"❌ Chapter generation failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Chapter generation failed: {str(e)}")
+        ),
+        generate_title(polished_chapter, request.genre)
+    )
+    
+    logger.info("Chapter generation complete")
+    
+    return ChapterResponse(
+        chapter_id=chapter_id,
+        title=title,
+        content=polished_chapter,
+        word_count=len(polished_chapter.split()),
+        style_guide=style_guide,
+        characters=characters,
+        lore=lore,
+        chapter_number=chapter_number,
+        previous_chapter_id=request.previous_chapter_id
+    )
 
 async def scrape_content(query: str) -> str:
-    """Scrape content from the web using the scraper service with fallback mechanism"""
+    """Scrape content for a query, serving repeat queries from the scrape cache"""
     
-    # First, try the enhanced scraper service
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{SCRAPER_SERVICE_URL}/scrape",
+    cached_content = await scrape_cache.get(query)
+    if cached_content is not None:
+        logger.debug("Using cached scrape (%s characters) for: %.50s...", len(cached_content), query)
+        return cached_content
+    
+    content, is_fallback = await scrape_from_services(query)
+    if content:
+        # A scraper's placeholder text stands in for an outage, so caching it would outlast the outage
+        if not is_fallback:
+            await scrape_cache.put(query, content)
+        return content
+    
+    # If both scrapers fail, return a basic fallback
+    logger.warning("All scrapers failed, using basic fallback for: %.50s...", query)
+    return f"Descriptive content related to: {query}"
+
+# A scraper that isn't running fails to connect almost immediately, so only the read gets the long
+# budget (a scrape loads a search page and then the result page)
+_SCRAPE_TIMEOUT = httpx.Timeout(30.0, connect=2.0)
+_SCRAPE_RETRIES = 2
+
+async def scrape_from_services(query: str) -> Tuple[Optional[str], bool]:
+    """Scrape content from the web using the scraper service with fallback mechanism, as (content, is_placeholder)"""
+    
+    # First, try the enhanced scraper service, then the fallback scraper; a placeholder is only
+    # used once neither has real content
+    placeholder = None
+    for name, url in (("Enhanced", SCRAPER_SERVICE_URL), ("Fallback", FALLBACK_SCRAPER_URL)):
+        content, is_fallback = await try_scrape(name, url, query)
+        if content and not is_fallback:
+            return content, False
+        placeholder = placeholder or content
+    
+    return placeholder, placeholder is not None
+
+async def try_scrape(name: str, base_url: str, query: str, retries: int = _SCRAPE_RETRIES) -> Tuple[Optional[str], bool]:
+    """Ask one scraper service for (content, is_fallback), retrying transient failures with exponential backoff"""
+    
+    for attempt in range(retries + 1):
+        try:
+            response = await app.state.http.post(
+                f"{base_url}/scrape",
                 json={"query": query, "source": "ai_engine"},
-                timeout=30.0
+                timeout=_SCRAPE_TIMEOUT
             )
             
             if response.status_code == 200:
-                data = response.json()
+                data = _json_loads(response.content)
                 content = data.get("content", "")
                 source = data.get("source", "scraped")
                 session_id = data.get("sessionId", "unknown")
                 
                 if content:
-                    print(f"✅ Enhanced scraper returned {len(content)} characters from {source} (session: {session_id})")
-                    return content
+                    logger.debug("%s scraper returned %s characters from %s (session: %s)", name, len(content), source, session_id)
+                    return content, False
                 elif data.get("fallback"):
-                    print(f"✅ Enhanced scraper returned fallback content (session: {session_id})")
-                    return data["fallback"]
-                    
-    except Exception as e:
-        print(f"⚠️  Enhanced scraper failed: {str(e)}")
-    
-    # If enhanced scraper fails, try the fallback scraper
-    try:
-        print(f"🔄 Trying fallback scraper for: {query[:50]}...")
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{FALLBACK_SCRAPER_URL}/scrape",
-                json={"query": query, "source": "ai_engine"},
-                timeout=30.0
-            )
+                    logger.debug("%s scraper returned fallback content (session: %s)", name, session_id)
+                    return data["fallback"], True
+                return None, False
             
-            if response.status_code == 200:
-                data = response.json()
-                content = data.get("content", "")
-                
-                if content:
-                    print(f"✅ Fallback scraper returned {len(content)} characters")
-                    return content
-                    
-    except Exception as e:
-        print(f"❌ Fallback scraper also failed: {str(e)}")
+            # Client errors won't change on retry
+            if response.status_code < 500:
+                logger.warning("%s scraper returned status %s", name, response.status_code)
+                return None, False
+            logger.warning("%s scraper returned status %s (attempt %s)", name, response.status_code, attempt + 1)
+        
+        except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            logger.warning("%s scraper unreachable (attempt %s): %s", name, attempt + 1, e)
+        except Exception as e:
+            # A read timeout means the scrape itself is slow; retrying would just wait again
+            logger.warning("%s scraper failed: %s", name, e)
+            return None, False
+        
+        if attempt < retries:
+            await asyncio.sleep(0.25 * 2 ** attempt)
     
-    # If both scrapers fail, return a basic fallback
-    print(f"⚠️  All scrapers failed, using basic fallback for: {query[:50]}...")
-    return f"Descriptive content related to: {query}"
+    return None, False
+
+# Words skipped when picking title words
+_TITLE_STOPWORDS = frozenset({'the', 'and', 'but', 'for', 'are', 'this', 'that'})
 
 async def generate_title(chapter_content: str, genre: str) -> str:
     """Generate a title for the chapter"""
+    # Shared by both fallback paths below
+    default_title = f"{genre.title()} Chapter"
     try:
         # Simple title generation - could be enhanced with AI
-        words = chapter_content.split()
+        # Only the first 20 words are used, so don't split the rest of the chapter
+        words = chapter_content.split(None, 20)[:20]
         if len(words) > 10:
             # Take first few meaningful words
             title_words = []
-            for word in words[:20]:
-                if len(word) > 3 and word.lower() not in ['the', 'and', 'but', 'for', 'are', 'this', 'that']:
+            for word in words:
+                if len(word) > 3 and word.lower() not in _TITLE_STOPWORDS:
                     title_words.append(word)
                 if len(title_words) >= 3:
                     break
@@ -286,11 +402,11 @@ async def generate_title(chapter_content: str, genre: str) -> str:
             if title_words:
                 return " ".join(title_words)
         
-        return f"{genre.title()} Chapter"
+        return default_title
         
     except Exception as e:
-        print(f"Title generation failed: {str(e)}")
-        return f"{genre.title()} Chapter"
+        logger.warning("Title generation failed: %s", e)
+        return default_title
 
 @app.get("/chapters/{chapter_id}")
 async def get_chapter(chapter_id: int):
@@ -355,5 +471,22 @@ if __name__ == "__main__":
     print(f"📡 Server running on http://{host}:{port}")
     print(f"🔗 Scraper service: {SCRAPER_SERVICE_URL}")
     
-    uvicorn.run(app, host=host, port=port)
+    # Style guides and scraped content are cached in SQLite, so extra worker processes share them
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    
+    # "auto" uses uvloop and httptools when installed and falls back to asyncio/h11 (e.g. on Windows)
+    if workers > 1:
+        print(f"👥 Workers: {workers}")
+        # Worker processes import the app themselves, so uvicorn needs an import string
+        uvicorn.run(
+            "main:app",
+            host=host,
+            port=port,
+            workers=workers,
+            loop="auto",
+            http="auto",
+            app_dir=os.path.dirname(os.path.abspath(__file__))
+        )
+    else:
+        uvicorn.run(app, host=host, port=port, loop="auto", http="auto")
 
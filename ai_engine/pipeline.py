@@ -0,0 +1,144 @@
+"""
+Chapter generation pipeline
+Runs the agents as a dependency graph so independent stages overlap instead of running back to back:
+
+    IntentAnalyst ─────────┐
+    SceneScout.deconstruct ┼─> per plot point: search query -> scrape -> weave ─> polish ─> (characters ∥ lore)
+    StyleAnalyst ──────────┘
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Receives (stage, data) as each stage finishes, e.g. to stream progress to the client
+EventCallback = Callable[[str, Any], Awaitable[None]]
+
+logger = logging.getLogger(__name__)
+
+class ChapterPipeline:
+    def __init__(
+        self,
+        intent_analyst,
+        scene_scout,
+        style_analyst,
+        master_weaver,
+        correction_polish,
+        character_extractor,
+        lore_master,
+        scrape_content: Callable[[str], Awaitable[str]]
+    ):
+        self.intent_analyst = intent_analyst
+        self.scene_scout = scene_scout
+        self.style_analyst = style_analyst
+        self.master_weaver = master_weaver
+        self.correction_polish = correction_polish
+        self.character_extractor = character_extractor
+        self.lore_master = lore_master
+        self.scrape_content = scrape_content
+        # Cap on plot points researched and woven at once within one chapter
+        self.weave_concurrency = int(os.getenv("WEAVE_CONCURRENCY", "4"))
+
+    async def run(
+        self,
+        summary: str,
+        genre: str,
+        previous_chapter_content: Optional[str] = None,
+        on_event: Optional[EventCallback] = None
+    ) -> Dict[str, Any]:
+        """Generate a polished chapter plus its characters and lore"""
+
+        # The three root stages only depend on the request, so they all start immediately
+        brief_task = asyncio.create_task(self._stage(
+            "brief", self.intent_analyst.analyze_intent(summary, previous_chapter_content, genre), on_event
+        ))
+        plot_points_task = asyncio.create_task(self._stage(
+            "plot_points", self.scene_scout.deconstruct_summary(summary), on_event
+        ))
+        style_task = asyncio.create_task(self._stage(
+            "style_guide", self.style_analyst.research_genre(genre), on_event
+        ))
+        root_tasks = (brief_task, plot_points_task, style_task)
+
+        try:
+            plot_points = await plot_points_task
+            logger.info("Generated %s plot points", len(plot_points))
+
+            # Each plot point waits only on the root results it needs, so scraping for one
+            # can overlap with style research and weaving of the others
+            weave_semaphore = asyncio.Semaphore(self.weave_concurrency)
+            chapter_sections = await asyncio.gather(*(
+                self._stage(
+                    "section",
+                    self._weave_plot_point(i, len(plot_points), plot_point, genre, brief_task, style_task, weave_semaphore),
+                    on_event,
+                    index=i
+                )
+                for i, plot_point in enumerate(plot_points)
+            ))
+            chapter_brief = await brief_task
+            style_guide = await style_task
+        finally:
+            # If any stage failed, don't leave the other root stages running unobserved
+            for task in root_tasks:
+                if not task.done():
+                    task.cancel()
+
+        raw_chapter = "\n\n".join(chapter_sections)
+        logger.info("Raw chapter created: %s characters", len(raw_chapter))
+
+        polished_chapter = await self._stage(
+            "polished", self.correction_polish.polish_chapter(raw_chapter, style_guide, chapter_brief), on_event
+        )
+        logger.info("Chapter polished: %s characters", len(polished_chapter))
+
+        characters, lore = await asyncio.gather(
+            self._stage("characters", self.character_extractor.extract_characters(polished_chapter), on_event),
+            self._stage("lore", self.lore_master.extract_lore(polished_chapter), on_event)
+        )
+        logger.info("Extracted %s characters and %s lore entries", len(characters), len(lore))
+
+        return {
+            "chapter_brief": chapter_brief,
+            "style_guide": style_guide,
+            "content": polished_chapter,
+            "characters": characters,
+            "lore": lore
+        }
+
+    async def _stage(self, stage: str, coro: Awaitable[T], on_event: Optional[EventCallback], **extra: Any) -> T:
+        """Await a stage and report its result to on_event, if given"""
+        result = await coro
+        if on_event is not None:
+            await on_event(stage, {**extra, "content": result} if extra else result)
+        return result
+
+    async def _weave_plot_point(
+        self,
+        index: int,
+        total: int,
+        plot_point: str,
+        genre: str,
+        brief_task: "asyncio.Task[str]",
+        style_task: "asyncio.Task[str]",
+        semaphore: asyncio.Semaphore
+    ) -> str:
+        """Research and weave a single plot point into a chapter section"""
+        # Hold a slot for the whole search -> scrape -> weave chain of this plot point
+        async with semaphore:
+            logger.info("Weaving plot point %s/%s: %s...", index + 1, total, plot_point[:50])
+
+            chapter_brief = await brief_task
+            search_query = await self.scene_scout.generate_search_query(plot_point, genre, chapter_brief)
+            logger.info("Search query: %s", search_query)
+
+            scraped_content = await self.scrape_content(search_query)
+            logger.info("Scraped %s characters of content", len(scraped_content))
+
+            style_guide = await style_task
+            woven_section = await self.master_weaver.weave_content(plot_point, scraped_content, style_guide, chapter_brief)
+            logger.info("Section %s woven successfully", index + 1)
+            return woven_section
@@ -0,0 +1,42 @@
+"""
+Fallback tracking for cached results
+API failures and agent error paths substitute mock content instead of raising, so caches use
+this to tell a stand-in result from a real one and avoid persisting it
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+class FallbackText(str):
+    """Mock text returned in place of a failed API call"""
+    __slots__ = ()
+
+class FallbackTracker:
+    """Records whether any fallback was used while it was active"""
+    __slots__ = ("used", "parent")
+
+    def __init__(self, parent: Optional["FallbackTracker"]):
+        self.used = False
+        self.parent = parent
+
+# A mutable tracker rather than a flag, so tasks spawned inside the tracked block (which get a copy
+# of the context) report back to the same tracker
+_current_tracker: ContextVar[Optional[FallbackTracker]] = ContextVar("fallback_tracker", default=None)
+
+@contextmanager
+def track_fallbacks() -> Iterator[FallbackTracker]:
+    """Track fallbacks used within the block; nested trackers also report to the enclosing ones"""
+    tracker = FallbackTracker(_current_tracker.get())
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+def mark_fallback() -> None:
+    """Note that the current result was built from fallback content"""
+    tracker = _current_tracker.get()
+    while tracker is not None:
+        tracker.used = True
+        tracker = tracker.parent
@@ -6,12 +6,50 @@ Provides a compatible interface for Gemini models through OpenRouter
 import os
 import httpx
 import json
+import logging
 from typing import Optional, Dict, Any, List, AsyncGenerator
 import asyncio
+from utils.fallback import FallbackText, mark_fallback
+from utils.llm_cache import CachedGeminiClient
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _JSONDecodeError = orjson.JSONDecodeError
+except ImportError:  # orjson is optional; the stdlib decodes the same documents, just slower
+    _json_loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+
+# HTTP/2 multiplexes the agents' concurrent API calls over one connection; httpx needs h2 for it
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# Every agent prompt states its task up front, so mock routing only needs to lowercase this much of it
+_MOCK_ROUTING_WINDOW = 512
+
+# Canned test-mode responses returned by GeminiClient._generate_mock_response
+_MOCK_SEARCH_QUERY = "mystery story character discovery descriptive scene"
+
+_MOCK_PLOT_RESPONSE = """The plot development should focus on the careful orchestration of revelation and concealment, with each scene serving as both answer and question. Key plot points include: the initial discovery that disrupts the status quo, the gathering of seemingly unrelated clues that gradually reveal patterns, the confrontation with uncomfortable truths that challenge assumptions, and the final integration of new knowledge that transforms understanding. Each scene should build upon the previous while planting seeds for future developments, creating a narrative architecture that feels both surprising and inevitable."""
+
+_MOCK_LORE_RESPONSE = """The world-building elements should establish a rich historical context that informs present events without overwhelming the narrative. Key lore includes: the lighthouse's century-long service as both guide and witness, the maritime community's oral tradition of passing down stories through generations, the geological and meteorological factors that shaped local legends, and the intersection of practical seafaring knowledge with superstitious beliefs. These elements should create a sense of place that feels authentic and lived-in, where every location holds memories and every object carries the weight of its history."""
+
+_MOCK_DEFAULT_RESPONSE = """The analysis reveals multiple layers of meaning woven throughout the narrative fabric. Each element serves dual purposes—advancing plot while revealing character, establishing setting while building atmosphere, providing information while maintaining mystery. The careful balance between revelation and concealment creates forward momentum that compels continued engagement. Through this systematic approach, the story achieves both immediate impact and lasting resonance, satisfying the reader's desire for both entertainment and substance."""
 
 class GeminiClient:
     """Client for Gemini API through OpenRouter"""
     
+    # Fixed attribute set: no per-instance __dict__, and a typo'd attribute raises instead of silently sticking
+    __slots__ = (
+        "api_key", "is_test_mode", "base_url", "headers", "model", "semaphore", "_http_client",
+        "generate_text", "generate_text_stream"
+    )
+    
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("OPENROUTER_API_KEY")
         
@@ -28,23 +66,78 @@ class GeminiClient:
             }
             self.model = os.getenv("GEMINI_MODEL", "google/gemini-pro")
         else:
-            print("🧪 Running in test mode - using mock responses")
+            logger.info("Running in test mode - using mock responses")
             self.base_url = None
             self.headers = None
             self.model = None
+        
+        # Agents fan out concurrently, so cap in-flight API requests to respect rate limits
+        self.semaphore = asyncio.Semaphore(int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")))
+        
+        # Pooled HTTP client shared by every request, created on first use
+        self._http_client: Optional[httpx.AsyncClient] = None
+        
+        # The mode is fixed for the client's lifetime, so pick the implementations once instead of
+        # branching on is_test_mode in every call
+        if self.is_test_mode:
+            self.generate_text = self._generate_text_mock
+            self.generate_text_stream = self._generate_text_stream_mock
+        else:
+            self.generate_text = self._generate_text_api
+            self.generate_text_stream = self._generate_text_stream_api
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get or create the pooled HTTP client so connections are kept alive between calls"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                timeout=60.0,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+                http2=_HTTP2_AVAILABLE
+            )
+        return self._http_client
     
-    async def generate_text(
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+    
+    async def __aenter__(self) -> "GeminiClient":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+    
+    async def _generate_text_mock(
+        self, 
+        prompt: str, 
+        max_tokens: int = 2000,
+        temperature: float = 0.7,
+        system_message: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """generate_text in test mode: answer with a mock response"""
+        return self._generate_mock_response(prompt)
+    
+    async def _generate_text_stream_mock(
         self, 
         prompt: str, 
         max_tokens: int = 2000,
         temperature: float = 0.7,
         system_message: Optional[str] = None
+    ) -> AsyncGenerator[str, None]:
+        """generate_text_stream in test mode: yield a mock response as a single chunk"""
+        yield self._generate_mock_response(prompt)
+    
+    async def _generate_text_api(
+        self, 
+        prompt: str, 
+        max_tokens: int = 2000,
+        temperature: float = 0.7,
+        system_message: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
     ) -> str:
-        """Generate text using Gemini model"""
-        
-        # Use mock response in test mode
-        if self.is_test_mode:
-            return self._generate_mock_response(prompt)
+        """Generate text using Gemini model, constrained to response_schema JSON when given"""
         
         messages = []
         
@@ -61,28 +154,35 @@ class GeminiClient:
             "stream": False
         }
         
+        # Structured output makes the model emit JSON matching the schema, with no fences or preamble
+        if response_schema is not None:
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "strict": True, "schema": response_schema}
+            }
+        
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
+            async with self.semaphore:
+                response = await self._get_http_client().post(
                     f"{self.base_url}/chat/completions",
                     headers=self.headers,
                     json=payload
                 )
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = _json_loads(response.content)
                     return data["choices"][0]["message"]["content"].strip()
                 else:
-                    print(f"Gemini API error: {response.status_code} - {response.text}")
+                    logger.warning("Gemini API error: %s - %s", response.status_code, response.text)
                     # Fallback to mock response
-                    return self._generate_mock_response(prompt)
+                    return self._fallback_response(prompt)
                     
         except Exception as e:
-            print(f"Gemini API request failed: {str(e)}")
+            logger.warning("Gemini API request failed: %s", e)
             # Fallback to mock response
-            return self._generate_mock_response(prompt)
+            return self._fallback_response(prompt)
     
-    async def generate_text_stream(
+    async def _generate_text_stream_api(
         self, 
         prompt: str, 
         max_tokens: int = 2000,
@@ -91,11 +191,6 @@ class GeminiClient:
     ) -> AsyncGenerator[str, None]:
         """Generate text using Gemini model with streaming"""
         
-        # Use mock response in test mode
-        if self.is_test_mode:
-            yield self._generate_mock_response(prompt)
-            return
-        
         messages = []
         
         if system_message:
@@ -112,8 +207,8 @@ class GeminiClient:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                async with client.stream(
+            async with self.semaphore:
+                async with self._get_http_client().stream(
                     "POST",
                     f"{self.base_url}/chat/completions",
                     headers=self.headers,
@@ -121,85 +216,90 @@ class GeminiClient:
                 ) as response:
                     if response.status_code == 200:
                         async for line in response.aiter_lines():
-                            if line.startswith("data: "):
-                                data_str = line[6:]
-                                if data_str == "[DONE]":
+                            # Only "data: {...}" frames carry content; blank lines and ": ..." keep-alive
+                            # comments are skipped without parsing
+                            if not line.startswith("data: {"):
+                                if line == "data: [DONE]":
                                     break
-                                try:
-                                    data = json.loads(data_str)
-                                    if "choices" in data and len(data["choices"]) > 0:
-                                        delta = data["choices"][0].get("delta", {})
-                                        if "content" in delta:
-                                            yield delta["content"]
-                                except json.JSONDecodeError:
-                                    continue
+                                continue
+                            try:
+                                choices = _json_loads(line[6:]).get("choices")
+                            except _JSONDecodeError:
+                                continue
+                            if choices:
+                                content = choices[0].get("delta", {}).get("content")
+                                if content is not None:
+                                    yield content
                     else:
-                        print(f"Gemini API streaming error: {response.status_code}")
-                        yield self._generate_mock_response(prompt)
+                        logger.warning("Gemini API streaming error: %s", response.status_code)
+                        yield self._fallback_response(prompt)
                         
         except Exception as e:
-            print(f"Gemini API streaming request failed: {str(e)}")
-            yield self._generate_mock_response(prompt)
+            logger.warning("Gemini API streaming request failed: %s", e)
+            yield self._fallback_response(prompt)
+    
+    def _fallback_response(self, prompt: str) -> FallbackText:
+        """Mock response standing in for a failed API call, flagged so it is never cached"""
+        mark_fallback()
+        return FallbackText(self._generate_mock_response(prompt))
     
     def _generate_mock_response(self, prompt: str) -> str:
         """Generate a mock response when API is unavailable"""
         # This is a fallback for development/testing
-        prompt_lower = prompt.lower()
+        prompt_lower = prompt[:_MOCK_ROUTING_WINDOW].lower()
         
         # Debug output to see what prompts are being sent
-        print(f"DEBUG: Prompt received, first 100 chars: {prompt[:100]}")
-        print(f"DEBUG: Contains 'search query': {'search query' in prompt_lower}")
-        print(f"DEBUG: Contains 'find': {'find' in prompt_lower}")
-        print(f"DEBUG: Contains 'descriptive': {'descriptive' in prompt_lower}")
+        logger.debug("Mock prompt received, first 100 chars: %.100s", prompt)
         
         # Search query generation for SceneScout - check this FIRST before style analysis
         if "search query" in prompt_lower and ("find" in prompt_lower and "descriptive" in prompt_lower):
             # Extract plot point and genre for context
-            plot_start = prompt.find("PLOT POINT:") if "PLOT POINT:" in prompt else -1
-            genre_start = prompt.find("GENRE:") if "GENRE:" in prompt else -1
+            # find() already returns -1 for a missing marker, so each marker is scanned for once
+            plot_start = prompt.find("PLOT POINT:")
+            genre_start = prompt.find("GENRE:")
             
-            print(f"DEBUG: Search query condition matched!")
-            print(f"DEBUG: plot_start: {plot_start}, genre_start: {genre_start}")
+            logger.debug("Mock search query branch: plot_start=%s, genre_start=%s", plot_start, genre_start)
             
             if plot_start != -1 and genre_start != -1:
-                plot_end = prompt.find("CHAPTER BRIEF", plot_start) if "CHAPTER BRIEF" in prompt else genre_start
+                plot_end = prompt.find("CHAPTER BRIEF", plot_start)
+                if plot_end == -1:
+                    plot_end = genre_start
                 plot_point = prompt[plot_start:plot_end].strip().replace("PLOT POINT:", "").strip()
                 # Remove any remaining GENRE: text that might be included
-                if "GENRE:" in plot_point:
-                    plot_point = plot_point.split("GENRE:")[0].strip()
+                plot_point = plot_point.split("GENRE:", 1)[0].strip()
                 genre = prompt[genre_start:genre_start+100].strip().replace("GENRE:", "").strip().split()[0]
                 
-                print(f"DEBUG: plot_point: '{plot_point}'")
-                print(f"DEBUG: genre: '{genre}'")
+                logger.debug("Mock plot_point: %r, genre: %r", plot_point, genre)
                 
                 # Generate appropriate search query based on plot point
-                if "challenge" in plot_point.lower() or "discovery" in plot_point.lower():
+                plot_point_lower = plot_point.lower()
+                if "challenge" in plot_point_lower or "discovery" in plot_point_lower:
                     result = f"{genre} story opening scene character faces discovery descriptive passage"
-                elif "obstacles" in plot_point.lower() or "conflicts" in plot_point.lower():
+                elif "obstacles" in plot_point_lower or "conflicts" in plot_point_lower:
                     result = f"{genre} story rising action conflict tension scene description"
-                elif "learn" in plot_point.lower() or "important" in plot_point.lower():
+                elif "learn" in plot_point_lower or "important" in plot_point_lower:
                     result = f"{genre} story character realization insight moment descriptive writing"
-                elif "resolution" in plot_point.lower() or "transformation" in plot_point.lower():
+                elif "resolution" in plot_point_lower or "transformation" in plot_point_lower:
                     result = f"{genre} story climax resolution character change scene"
                 else:
                     result = f"{genre} story {plot_point[:30]} descriptive narrative"
                 
-                print(f"DEBUG: Generated search query: '{result}'")
+                logger.debug("Mock generated search query: %r", result)
                 return result
             else:
-                return "mystery story character discovery descriptive scene"
+                return _MOCK_SEARCH_QUERY
         
         # Plot/scene development responses
         elif "plot" in prompt_lower or "scene" in prompt_lower or "scout" in prompt_lower:
-            return """The plot development should focus on the careful orchestration of revelation and concealment, with each scene serving as both answer and question. Key plot points include: the initial discovery that disrupts the status quo, the gathering of seemingly unrelated clues that gradually reveal patterns, the confrontation with uncomfortable truths that challenge assumptions, and the final integration of new knowledge that transforms understanding. Each scene should build upon the previous while planting seeds for future developments, creating a narrative architecture that feels both surprising and inevitable."""
+            return _MOCK_PLOT_RESPONSE
         
         # Lore/world-building responses
         elif "lore" in prompt_lower or "world" in prompt_lower:
-            return """The world-building elements should establish a rich historical context that informs present events without overwhelming the narrative. Key lore includes: the lighthouse's century-long service as both guide and witness, the maritime community's oral tradition of passing down stories through generations, the geological and meteorological factors that shaped local legends, and the intersection of practical seafaring knowledge with superstitious beliefs. These elements should create a sense of place that feels authentic and lived-in, where every location holds memories and every object carries the weight of its history."""
+            return _MOCK_LORE_RESPONSE
         
         # Default response for other prompts
         else:
-            return """The analysis reveals multiple layers of meaning woven throughout the narrative fabric. Each element serves dual purposes—advancing plot while revealing character, establishing setting while building atmosphere, providing information while maintaining mystery. The careful balance between revelation and concealment creates forward momentum that compels continued engagement. Through this systematic approach, the story achieves both immediate impact and lasting resonance, satisfying the reader's desire for both entertainment and substance."""
+            return _MOCK_DEFAULT_RESPONSE
 
 # Create a singleton instance for easy import
 # Note: This will be initialized after environment variables are loaded
@@ -209,5 +309,8 @@ def get_gemini_client():
     """Get or create the singleton Gemini client instance"""
     global gemini_client
     if gemini_client is None:
-        gemini_client = GeminiClient()
+        gemini_client = CachedGeminiClient(
+            GeminiClient(),
+            max_entries=int(os.getenv("GEMINI_CACHE_SIZE", "256"))
+        )
     return gemini_client
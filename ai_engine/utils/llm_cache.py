@@ -0,0 +1,121 @@
+"""
+Response cache for Gemini API calls
+Skips the API entirely when an identical low-temperature request has already been answered,
+and lets identical concurrent requests share a single API call
+"""
+
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from utils.fallback import FallbackText, mark_fallback
+
+try:
+    import orjson
+
+    def _dump_schema(schema: Dict[str, Any]) -> bytes:
+        return orjson.dumps(schema, option=orjson.OPT_SORT_KEYS)
+except ImportError:  # orjson is optional; the stdlib produces the same canonical key, just slower
+    def _dump_schema(schema: Dict[str, Any]) -> bytes:
+        return json.dumps(schema, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+# Above this temperature responses are meant to vary, so serving a cached one would change behaviour
+CACHEABLE_MAX_TEMPERATURE = 0.2
+
+class CachedGeminiClient:
+    """Proxy around GeminiClient that caches generate_text responses by request content"""
+
+    def __init__(self, client, max_entries: int = 256):
+        self._client = client
+        self._max_entries = max_entries
+        self._responses: "OrderedDict[str, str]" = OrderedDict()
+        # Requests currently awaiting the API, so identical concurrent calls share one response
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def __getattr__(self, name):
+        # Everything that isn't cached (streaming, configuration) goes straight to the wrapped client
+        return getattr(self._client, name)
+
+    def _cache_key(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        system_message: Optional[str],
+        response_schema: Optional[Dict[str, Any]]
+    ) -> str:
+        """Content-address a request by everything that influences the response"""
+        digest = hashlib.sha256()
+        for part in (self._client.model or "", str(temperature), str(max_tokens), system_message or ""):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        # Hashed as bytes straight from the encoder, without a str round-trip
+        if response_schema is not None:
+            digest.update(_dump_schema(response_schema))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        digest.update(b"\0")
+        return digest.hexdigest()
+
+    async def generate_text(
+        self,
+        prompt: str,
+        max_tokens: int = 2000,
+        temperature: float = 0.7,
+        system_message: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None,
+        cache: Optional[bool] = None
+    ) -> str:
+        """Generate text, serving repeated deterministic requests from the cache"""
+
+        # Mock responses are already free, and cache=False opts out of sharing responses entirely
+        if cache is False or self._client.is_test_mode:
+            return await self._client.generate_text(
+                prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system_message=system_message,
+                response_schema=response_schema
+            )
+
+        # Identical concurrent requests are always coalesced, but only deterministic
+        # responses are kept around for later calls
+        cacheable = temperature <= CACHEABLE_MAX_TEMPERATURE if cache is None else cache
+
+        key = self._cache_key(prompt, max_tokens, temperature, system_message, response_schema)
+        if cacheable:
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+                return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._client.generate_text(
+                prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system_message=system_message,
+                response_schema=response_schema
+            ))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Shield so one cancelled caller doesn't cancel the request for everyone else
+        response = await asyncio.shield(task)
+
+        # A mock stand-in for a failed call would otherwise be served for this request until evicted;
+        # callers sharing the in-flight request are flagged in their own context too
+        if isinstance(response, FallbackText):
+            mark_fallback()
+            return response
+
+        if cacheable:
+            self._responses[key] = response
+            self._responses.move_to_end(key)
+            if len(self._responses) > self._max_entries:
+                self._responses.popitem(last=False)
+
+        return response
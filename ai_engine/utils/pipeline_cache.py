@@ -0,0 +1,76 @@
+"""
+Disk cache for agent outputs
+Lets re-runs of the same chapter (common while iterating on prompts or the frontend) read every
+agent's result from disk instead of calling the API again
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Optional
+
+from utils.fallback import track_fallbacks
+from utils.gemini_client import get_gemini_client
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: regenerating a chapter is expected to produce a fresh draft unless caching is asked for
+PIPELINE_CACHE_ENABLED = os.getenv("PIPELINE_CACHE", "off").lower() in ("1", "on", "true", "yes")
+PIPELINE_CACHE_DIR = os.getenv("PIPELINE_CACHE_DIR", os.path.join(".cache", "pipeline"))
+
+def _cache_path(key: str) -> str:
+    return os.path.join(PIPELINE_CACHE_DIR, f"{key}.json")
+
+def _read(key: str) -> Optional[Any]:
+    """Load a cached result, or None if it isn't cached"""
+    try:
+        with open(_cache_path(key), "r", encoding="utf-8") as f:
+            return json.load(f)["value"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+def _write(key: str, value: Any) -> None:
+    """Store a result atomically so a concurrent reader never sees a partial file"""
+    os.makedirs(PIPELINE_CACHE_DIR, exist_ok=True)
+    path = _cache_path(key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"value": value}, f)
+    os.replace(tmp_path, path)
+
+def acached(method):
+    """Cache an agent's async method on disk, keyed by agent class, method name and arguments"""
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        # Mock responses are free, and caching them would mask real output once a key is configured
+        if not PIPELINE_CACHE_ENABLED or get_gemini_client().is_test_mode:
+            return await method(self, *args, **kwargs)
+
+        digest = hashlib.sha256()
+        digest.update(f"{self.__class__.__name__}.{method.__name__}".encode("utf-8"))
+        digest.update(json.dumps([args, kwargs], sort_keys=True, default=str).encode("utf-8"))
+        key = digest.hexdigest()
+
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(None, _read, key)
+        if cached is not None:
+            logger.debug("%s.%s: Served from pipeline cache", self.__class__.__name__, method.__name__)
+            return cached
+
+        with track_fallbacks() as fallbacks:
+            result = await method(self, *args, **kwargs)
+        # Results built from mock fallbacks after an API error would otherwise be served forever
+        if fallbacks.used:
+            logger.debug("%s.%s: Fallback result not cached", self.__class__.__name__, method.__name__)
+            return result
+        try:
+            await loop.run_in_executor(None, _write, key, result)
+        except OSError as e:
+            logger.warning("Failed to write pipeline cache entry: %s", e)
+        return result
+
+    return wrapper
@@ -0,0 +1,76 @@
+"""
+Cache for scraped research content
+Similar chapters produce the same or reordered search queries, so repeat queries are served
+from memory or the database instead of hitting the scraper services again
+"""
+
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from database.db_manager import get_db_manager
+
+_WORD_RE = re.compile(r"\w+")
+
+def normalize_query(query: str) -> str:
+    """Reduce a query to its distinct lowercase words so reordered or re-spaced queries share a key"""
+    return " ".join(sorted(set(_WORD_RE.findall(query.lower()))))
+
+class ScrapeCache:
+    """Two-tier (memory, then SQLite) cache of scraper output keyed by normalized query"""
+
+    def __init__(self, db_manager, ttl_seconds: float = 86400, max_entries: int = 512):
+        self.db_manager = db_manager
+        self.ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def _key(self, query: str) -> str:
+        return hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()
+
+    async def get(self, query: str) -> Optional[str]:
+        """Return fresh cached content for the query, or None"""
+        key = self._key(query)
+        oldest_allowed = time.time() - self.ttl_seconds
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] >= oldest_allowed:
+                self._entries.move_to_end(key)
+                return entry[1]
+            del self._entries[key]
+
+        row = await self.db_manager.get_scraped_content(key, oldest_allowed)
+        if row is None:
+            return None
+        self._remember(key, row["created_at"], row["content"])
+        return row["content"]
+
+    async def put(self, query: str, content: str) -> None:
+        """Store scraped content for the query in memory and the database"""
+        key = self._key(query)
+        created_at = time.time()
+        self._remember(key, created_at, content)
+        await self.db_manager.store_scraped_content(key, content, created_at, created_at - self.ttl_seconds)
+
+    def _remember(self, key: str, created_at: float, content: str) -> None:
+        self._entries[key] = (created_at, content)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+# Create a singleton instance so every caller shares the in-memory tier
+scrape_cache = None
+
+def get_scrape_cache():
+    """Get or create the singleton ScrapeCache instance"""
+    global scrape_cache
+    if scrape_cache is None:
+        scrape_cache = ScrapeCache(
+            get_db_manager(),
+            ttl_seconds=float(os.getenv("SCRAPE_CACHE_TTL", "86400")),
+            max_entries=int(os.getenv("SCRAPE_CACHE_SIZE", "512"))
+        )
+    return scrape_cache
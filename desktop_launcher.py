@@ -13,36 +13,19 @@ import subprocess
 from pathlib import Path
 import json
 
-def create_desktop_shortcut():
-    """Create desktop shortcut for the writing assistant"""
-    project_root = Path(__file__).parent
-    desktop_dir = Path.home() / "Desktop"
-    
-    # Ensure desktop directory exists
-    desktop_dir.mkdir(exist_ok=True)
-    
-    if platform.system() == "Windows":
-        # Windows batch file
-        shortcut_path = desktop_dir / "AI Writing Assistant.bat"
-        with open(shortcut_path, "w") as f:
-            f.write(f'''@echo off
+# The launcher only targets the platform it runs on, so look it up once
+_OS = platform.system()
+
+# Generated files are encoded once here rather than on every write. Batch files are given the
+# CRLF line endings cmd.exe expects, since binary writes skip Windows newline translation
+_WINDOWS_SHORTCUT_TEMPLATE = '''@echo off
 echo Starting AI Research Assistant for Writers...
 cd /d "{project_root}"
 python start_mock_system.py
 pause
-''')
-        print(f"✅ Windows shortcut created: {shortcut_path}")
-        
-    elif platform.system() == "Darwin":  # macOS
-        # macOS app bundle
-        app_path = desktop_dir / "AI Writing Assistant.app"
-        app_path.mkdir(exist_ok=True)
-        
-        # Create Info.plist
-        info_plist = app_path / "Contents" / "Info.plist"
-        info_plist.parent.mkdir(exist_ok=True)
-        
-        plist_content = '''<?xml version="1.0" encoding="UTF-8"?>
+'''.replace("\n", "\r\n")
+
+_INFO_PLIST_BYTES = b'''<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
 <plist version="1.0">
 <dict>
@@ -58,31 +41,13 @@ pause
     <string>APPL</string>
 </dict>
 </plist>'''
-        
-        with open(info_plist, "w") as f:
-            f.write(plist_content)
-        
-        # Create launch script
-        macos_dir = app_path / "Contents" / "MacOS"
-        macos_dir.mkdir(exist_ok=True)
-        
-        launch_script = macos_dir / "launch_script"
-        with open(launch_script, "w") as f:
-            f.write(f'''#!/bin/bash
+
+_MACOS_LAUNCH_TEMPLATE = '''#!/bin/bash
 cd "{project_root}"
 python3 start_mock_system.py
-''')
-        
-        # Make script executable
-        os.chmod(launch_script, 0o755)
-        
-        print(f"✅ macOS app created: {app_path}")
-        
-    else:  # Linux
-        # Linux desktop file
-        desktop_file = desktop_dir / "ai-writing-assistant.desktop"
-        
-        desktop_content = f'''[Desktop Entry]
+'''
+
+_LINUX_DESKTOP_TEMPLATE = '''[Desktop Entry]
 Version=1.0
 Type=Application
 Name=AI Writing Assistant
@@ -93,37 +58,22 @@ Path={project_root}
 Terminal=true
 Categories=Office;TextEditor;
 '''
-        
-        with open(desktop_file, "w") as f:
-            f.write(desktop_content)
-        
-        # Make desktop file executable
-        os.chmod(desktop_file, 0o755)
-        
-        print(f"✅ Linux desktop shortcut created: {desktop_file}")
 
-def create_install_script():
-    """Create installation script for dependencies"""
-    project_root = Path(__file__).parent
-    
-    if platform.system() == "Windows":
-        install_script = project_root / "install_dependencies.bat"
-        with open(install_script, "w") as f:
-            f.write('''@echo off
+_INSTALL_BAT_BYTES = '''@echo off
 echo Installing dependencies for AI Research Assistant...
 echo Installing Python packages...
 pip install fastapi uvicorn pydantic httpx python-dotenv aiofiles requests
 echo Python packages installed!
+echo Precompiling Python modules...
+python -m compileall -q "%~dp0ai_engine"
 echo.
 echo Note: Node.js is required for the scraper service.
 echo Please install Node.js from https://nodejs.org/
 echo.
 pause
-''')
-    else:
-        install_script = project_root / "install_dependencies.sh"
-        with open(install_script, "w") as f:
-            f.write('''#!/bin/bash
+'''.replace("\n", "\r\n").encode("utf-8")
+
+_INSTALL_SH_BYTES = b'''#!/bin/bash
 echo "Installing dependencies for AI Research Assistant..."
 
 # Check if Python 3 is available
@@ -131,6 +81,9 @@ if command -v python3 &> /dev/null; then
     echo "Installing Python packages..."
     python3 -m pip install fastapi uvicorn pydantic httpx python-dotenv aiofiles requests
     echo "Python packages installed!"
+    # Compile bytecode once here so launches don't compile the engine's modules on first import
+    echo "Precompiling Python modules..."
+    python3 -m compileall -q "$(dirname "$0")/ai_engine"
 else
     echo "Python 3 not found. Please install Python 3.8 or higher."
 fi
@@ -145,20 +98,9 @@ fi
 
 echo "Installation complete!"
 read -p "Press Enter to continue..."
-''')
-        
-        # Make script executable on Unix systems
-        if platform.system() != "Windows":
-            os.chmod(install_script, 0o755)
-    
-    print(f"✅ Install script created: {install_script}")
+'''
 
-def create_readme():
-    """Create user-friendly README"""
-    project_root = Path(__file__).parent
-    readme_path = project_root / "USER_GUIDE.md"
-    
-    readme_content = '''# AI Research Assistant for Writers - User Guide
+_USER_GUIDE_BYTES = '''# AI Research Assistant for Writers - User Guide
 
 ## 🚀 Quick Start
 
@@ -237,10 +179,85 @@ For issues or questions:
 ---
 
 **Enjoy writing with your AI Research Assistant!** 🎉
-'''
+'''.encode("utf-8")
+
+def _write_windows_shortcut(project_root, desktop_dir):
+    """Create a Windows batch file shortcut"""
+    shortcut_path = desktop_dir / "AI Writing Assistant.bat"
+    shortcut_path.write_bytes(_WINDOWS_SHORTCUT_TEMPLATE.format(project_root=project_root).encode("utf-8"))
+    print(f"✅ Windows shortcut created: {shortcut_path}")
+
+def _write_macos_app(project_root, desktop_dir):
+    """Create a macOS app bundle"""
+    app_path = desktop_dir / "AI Writing Assistant.app"
+    contents_dir = app_path / "Contents"
+    macos_dir = contents_dir / "MacOS"
+    
+    # Create the whole bundle tree (app, Contents, MacOS) in one call
+    macos_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Create Info.plist
+    info_plist = contents_dir / "Info.plist"
+    info_plist.write_bytes(_INFO_PLIST_BYTES)
+    
+    # Create launch script
+    launch_script = macos_dir / "launch_script"
+    launch_script.write_bytes(_MACOS_LAUNCH_TEMPLATE.format(project_root=project_root).encode("utf-8"))
+    
+    # Make script executable
+    os.chmod(launch_script, 0o755)
+    
+    print(f"✅ macOS app created: {app_path}")
+
+def _write_linux_desktop(project_root, desktop_dir):
+    """Create a Linux .desktop file"""
+    desktop_file = desktop_dir / "ai-writing-assistant.desktop"
+    
+    desktop_file.write_bytes(_LINUX_DESKTOP_TEMPLATE.format(project_root=project_root).encode("utf-8"))
+    
+    # Make desktop file executable
+    os.chmod(desktop_file, 0o755)
+    
+    print(f"✅ Linux desktop shortcut created: {desktop_file}")
+
+# Shortcut writer per platform; anything else gets the Linux .desktop file
+_SHORTCUT_WRITERS = {
+    "Windows": _write_windows_shortcut,
+    "Darwin": _write_macos_app
+}
+
+def create_desktop_shortcut():
+    """Create desktop shortcut for the writing assistant"""
+    project_root = Path(__file__).parent
+    desktop_dir = Path.home() / "Desktop"
+    
+    # Ensure desktop directory exists
+    desktop_dir.mkdir(exist_ok=True)
+    
+    _SHORTCUT_WRITERS.get(_OS, _write_linux_desktop)(project_root, desktop_dir)
+
+def create_install_script():
+    """Create installation script for dependencies"""
+    project_root = Path(__file__).parent
+    
+    if _OS == "Windows":
+        install_script = project_root / "install_dependencies.bat"
+        install_script.write_bytes(_INSTALL_BAT_BYTES)
+    else:
+        install_script = project_root / "install_dependencies.sh"
+        install_script.write_bytes(_INSTALL_SH_BYTES)
+        
+        # Make script executable on Unix systems
+        os.chmod(install_script, 0o755)
+    
+    print(f"✅ Install script created: {install_script}")
+
+def create_readme():
+    """Create user-friendly README"""
+    project_root = Path(__file__).parent
+    readme_path = project_root / "USER_GUIDE.md"
     
-    with open(readme_path, "w") as f:
-        f.write(readme_content)
+    readme_path.write_bytes(_USER_GUIDE_BYTES)
     
     print(f"✅ User guide created: {readme_path}")
 
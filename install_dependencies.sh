@@ -6,6 +6,9 @@ if command -v python3 &> /dev/null; then
     echo "Installing Python packages..."
     python3 -m pip install fastapi uvicorn pydantic httpx python-dotenv aiofiles requests
     echo "Python packages installed!"
+    # Compile bytecode once here so launches don't compile the engine's modules on first import
+    echo "Precompiling Python modules..."
+    python3 -m compileall -q "$(dirname "$0")/ai_engine"
 else
     echo "Python 3 not found. Please install Python 3.8 or higher."
 fi
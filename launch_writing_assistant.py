@@ -4,242 +4,52 @@ AI Research Assistant for Writers - Auto-Launcher
 This script automatically sets up and launches the entire writing assistant system.
 """
 
+import asyncio
 import os
 import sys
+import functools
+import hashlib
+import importlib.metadata
+import signal
 import subprocess
 import time
-import json
-import platform
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
 
-class WritingAssistantLauncher:
-    def __init__(self):
-        self.project_root = Path(__file__).parent
-        self.ai_engine_dir = self.project_root / "ai_engine"
-        self.scraper_dir = self.project_root / "scraper_service"
-        self.frontend_dir = self.project_root / "frontend_app"
-        self.logs_dir = self.project_root / "logs"
-        
-        # Create logs directory
-        self.logs_dir.mkdir(exist_ok=True)
-        
-        # Service ports
-        self.ai_engine_port = 8000
-        self.scraper_port = 3001
-        self.frontend_port = 3000
-        
-        # Process tracking
-        self.processes = {}
-        
-    def log(self, message: str):
-        """Log message with timestamp"""
-        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-        log_message = f"[{timestamp}] {message}"
-        print(log_message)
-        
-        # Also write to log file
-        with open(self.logs_dir / "launcher.log", "a") as f:
-            f.write(log_message + "\n")
-    
-    def check_python_version(self) -> bool:
-        """Check if Python version is compatible"""
-        version = sys.version_info
-        if version.major < 3 or (version.major == 3 and version.minor < 8):
-            self.log(f"❌ Python 3.8+ required, found {version.major}.{version.minor}")
-            return False
-        self.log(f"✅ Python {version.major}.{version.minor} detected")
-        return True
-    
-    def check_node_version(self) -> bool:
-        """Check if Node.js is available"""
-        try:
-            result = subprocess.run(["node", "--version"], capture_output=True, text=True)
-            if result.returncode == 0:
-                version = result.stdout.strip()
-                self.log(f"✅ Node.js {version} detected")
-                return True
-            else:
-                self.log("❌ Node.js not found")
-                return False
-        except FileNotFoundError:
-            self.log("❌ Node.js not found")
-            return False
-    
-    def install_python_dependencies(self):
-        """Install Python dependencies for AI Engine"""
-        self.log("📦 Installing Python dependencies for AI Engine...")
-        
-        requirements_file = self.ai_engine_dir / "requirements.txt"
-        if not requirements_file.exists():
-            # Create requirements.txt if it doesn't exist
-            requirements = [
-                "fastapi==0.104.1",
-                "uvicorn==0.24.0",
-                "pydantic==2.5.0",
-                "httpx==0.25.2",
-                "python-dotenv==1.0.0",
-                "aiofiles==23.2.1",
-                "sqlite3",  # Usually built-in
-            ]
-            with open(requirements_file, "w") as f:
-                f.write("\n".join(requirements))
-            self.log("Created requirements.txt")
-        
-        try:
-            subprocess.run([
-                sys.executable, "-m", "pip", "install", "-r", str(requirements_file)
-            ], check=True, capture_output=True, text=True)
-            self.log("✅ Python dependencies installed successfully")
-            return True
-        except subprocess.CalledProcessError as e:
-            self.log(f"❌ Failed to install Python dependencies: {e}")
-            return False
-    
-    def install_node_dependencies(self):
-        """Install Node.js dependencies for Scraper Service"""
-        self.log("📦 Installing Node.js dependencies for Scraper Service...")
-        
-        package_json = self.scraper_dir / "package.json"
-        if not package_json.exists():
-            # Create package.json if it doesn't exist
-            package_data = {
-                "name": "scraper-service",
-                "version": "1.0.0",
-                "description": "Web scraping service for AI Research Assistant",
-                "main": "server.js",
-                "scripts": {
-                    "start": "node server.js",
-                    "dev": "nodemon server.js"
-                },
-                "dependencies": {
-                    "express": "^4.18.2",
-                    "cors": "^2.8.5",
-                    "playwright": "^1.40.0",
-                    "dotenv": "^16.3.1"
-                },
-                "devDependencies": {
-                    "nodemon": "^3.0.1"
-                }
-            }
-            with open(package_json, "w") as f:
-                json.dump(package_data, f, indent=2)
-            self.log("Created package.json")
-        
-        try:
-            subprocess.run([
-                "npm", "install"
-            ], cwd=self.scraper_dir, check=True, capture_output=True, text=True)
-            self.log("✅ Node.js dependencies installed successfully")
-            return True
-        except subprocess.CalledProcessError as e:
-            self.log(f"❌ Failed to install Node.js dependencies: {e}")
-            return False
-    
-    def create_environment_files(self):
-        """Create environment files with default settings"""
-        self.log("📝 Creating environment files...")
-        
-        # AI Engine .env
-        ai_env = self.ai_engine_dir / ".env"
-        if not ai_env.exists():
-            env_content = f"""# AI Research Assistant Configuration
-SCRAPER_SERVICE_URL=http://localhost:{self.scraper_port}
-DATABASE_URL=sqlite:///writing_assistant.db
-LOG_LEVEL=INFO
-"""
-            with open(ai_env, "w") as f:
-                f.write(env_content)
-            self.log("Created ai_engine/.env")
-        
-        # Scraper Service .env
-        scraper_env = self.scraper_dir / ".env"
-        if not scraper_env.exists():
-            env_content = f"""# Scraper Service Configuration
-PORT={self.scraper_port}
-LOG_LEVEL=INFO
-"""
-            with open(scraper_env, "w") as f:
-                f.write(env_content)
-            self.log("Created scraper_service/.env")
-    
-    def start_ai_engine(self) -> bool:
-        """Start the AI Engine service"""
-        self.log("🚀 Starting AI Engine...")
-        
-        try:
-            process = subprocess.Popen([
-                sys.executable, "main.py"
-            ], cwd=self.ai_engine_dir, 
-            stdout=open(self.logs_dir / "ai_engine.log", "w"),
-            stderr=subprocess.STDOUT)
-            
-            self.processes['ai_engine'] = process
-            self.log("✅ AI Engine started")
-            
-            # Wait a moment for it to start
-            time.sleep(3)
-            return True
-            
-        except Exception as e:
-            self.log(f"❌ Failed to start AI Engine: {e}")
-            return False
-    
-    def start_scraper_service(self) -> bool:
-        """Start the Scraper Service"""
-        self.log("🚀 Starting Scraper Service...")
-        
-        try:
-            process = subprocess.Popen([
-                "node", "server.js"
-            ], cwd=self.scraper_dir,
-            stdout=open(self.logs_dir / "scraper_service.log", "w"),
-            stderr=subprocess.STDOUT)
-            
-            self.processes['scraper_service'] = process
-            self.log("✅ Scraper Service started")
-            
-            # Wait a moment for it to start
-            time.sleep(3)
-            return True
-            
-        except Exception as e:
-            self.log(f"❌ Failed to start Scraper Service: {e}")
-            return False
-    
-    def start_frontend(self) -> bool:
-        """Start the frontend"""
-        self.log("🚀 Starting Frontend...")
-        
-        # Create simple frontend if it doesn't exist
-        frontend_html = self.project_root / "index.html"
-        if not frontend_html.exists():
-            self.create_frontend()
-        
-        try:
-            process = subprocess.Popen([
-                sys.executable, "-m", "http.server", str(self.frontend_port)
-            ], cwd=self.project_root,
-            stdout=open(self.logs_dir / "frontend.log", "w"),
-            stderr=subprocess.STDOUT)
-            
-            self.processes['frontend'] = process
-            self.log("✅ Frontend started")
-            
-            # Wait a moment for it to start
-            time.sleep(2)
-            return True
-            
-        except Exception as e:
-            self.log(f"❌ Failed to start Frontend: {e}")
-            return False
-    
-    def create_frontend(self):
-        """Create a simple frontend HTML file"""
-        self.log("🎨 Creating frontend...")
-        
-        frontend_content = '''<!DOCTYPE html>
+# Default dependency manifests, pre-serialized so creating them is a single write
+_REQUIREMENTS_TXT_BYTES = b'''fastapi==0.104.1
+uvicorn==0.24.0
+pydantic==2.5.0
+httpx==0.25.2
+python-dotenv==1.0.0
+aiofiles==23.2.1
+sqlite3'''
+
+_PACKAGE_JSON_BYTES = b'''{
+  "name": "scraper-service",
+  "version": "1.0.0",
+  "description": "Web scraping service for AI Research Assistant",
+  "main": "server.js",
+  "scripts": {
+    "start": "node server.js",
+    "dev": "nodemon server.js"
+  },
+  "dependencies": {
+    "express": "^4.18.2",
+    "cors": "^2.8.5",
+    "playwright": "^1.40.0",
+    "dotenv": "^16.3.1"
+  },
+  "devDependencies": {
+    "nodemon": "^3.0.1"
+  }
+}'''
+
+# Fallback frontend page, served when the project has no index.html of its own
+_FRONTEND_HTML_SOURCE = '''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -408,13 +218,359 @@ LOG_LEVEL=INFO
     </script>
 </body>
 </html>'''
+
+# Indentation is stripped once at import rather than shipped to the browser; line breaks are kept
+# so the inline script's statement boundaries don't change
+_FRONTEND_HTML_BYTES = "\n".join(
+    line.strip() for line in _FRONTEND_HTML_SOURCE.splitlines() if line.strip()
+).encode("utf-8")
+
+@functools.lru_cache(maxsize=None)
+def _probe(command: Tuple[str, ...]) -> Optional[Tuple[int, str]]:
+    """Run a version probe once per process, returning (returncode, stdout), or None if it isn't installed"""
+    # Resolving the executable up front avoids spawning a process just to find it's missing
+    executable = shutil.which(command[0])
+    if executable is None:
+        return None
+    result = subprocess.run([executable, *command[1:]], capture_output=True, text=True)
+    return result.returncode, result.stdout.strip()
+
+@functools.lru_cache(maxsize=None)
+def _requests_module():
+    """Import requests, installing it once per process if it's missing"""
+    # requests is only needed by the launcher's own system test, not by any service's requirements,
+    # so a fresh checkout may not have it yet
+    try:
+        import requests
+    except ImportError:
+        subprocess.run([sys.executable, "-m", "pip", "install", "requests"])
+        # The import system caches directory listings, so it won't see the new package without this
+        importlib.invalidate_caches()
+        import requests
+    return requests
+
+class ServiceSpec(NamedTuple):
+    """How to launch one service and check that it came up"""
+    name: str
+    label: str
+    argv: List[str]
+    cwd: Path
+    log_file: str
+    port: int
+    health_path: Optional[str]
+    required: bool
+
+class WritingAssistantLauncher:
+    def __init__(self):
+        self.project_root = Path(__file__).parent
+        self.ai_engine_dir = self.project_root / "ai_engine"
+        self.scraper_dir = self.project_root / "scraper_service"
+        self.frontend_dir = self.project_root / "frontend_app"
+        self.logs_dir = self.project_root / "logs"
+        
+        # Create logs directory
+        self.logs_dir.mkdir(exist_ok=True)
+        
+        # Keep the launcher log open for the whole run; line buffering flushes each message as it's logged
+        self._logf = open(self.logs_dir / "launcher.log", "a", buffering=1)
+        
+        # Service ports
+        self.ai_engine_port = 8000
+        self.scraper_port = 3001
+        self.frontend_port = 3000
+        
+        # Every service the launcher runs; the frontend is a static file server without a health endpoint
+        self.services = [
+            ServiceSpec("ai_engine", "AI Engine", [sys.executable, "main.py"], self.ai_engine_dir,
+                        "ai_engine.log", self.ai_engine_port, "/health", required=True),
+            ServiceSpec("scraper_service", "Scraper Service", ["node", "server.js"], self.scraper_dir,
+                        "scraper_service.log", self.scraper_port, "/health", required=False),
+            ServiceSpec("frontend", "Frontend", [sys.executable, "-m", "http.server", str(self.frontend_port)],
+                        self.project_root, "frontend.log", self.frontend_port, None, required=True),
+        ]
+        
+        # Process tracking
+        self.processes = {}
+        self._log_handles = []
+        self._stop = threading.Event()
+        
+    def log(self, message: str):
+        """Log message with timestamp"""
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        log_message = f"[{timestamp}] {message}"
+        print(log_message)
+        
+        # Also write to log file
+        self._logf.write(log_message + "\n")
+    
+    def _open_logfile(self, name: str):
+        """Open a service log for appending and track it so it's closed on shutdown"""
+        # Unbuffered binary appends go straight to the OS page cache, and earlier runs' logs are kept
+        handle = open(self.logs_dir / name, "ab", buffering=0)
+        self._log_handles.append(handle)
+        return handle
+    
+    def _dependency_digest(self, *parts: bytes) -> str:
+        """Hash everything an install depends on, so an unchanged install can be detected"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(hashlib.sha256(part).digest())
+        return digest.hexdigest()
+    
+    def _stamp_matches(self, stamp: Path, digest: str) -> bool:
+        """Check whether the last successful install recorded this digest"""
+        try:
+            return stamp.read_text() == digest
+        except FileNotFoundError:
+            return False
+    
+    def _requirements_installed(self, requirements_file: Path) -> bool:
+        """Check in-process that every pinned requirement is installed at its pinned version"""
+        for line in requirements_file.read_text().splitlines():
+            requirement = line.split("#", 1)[0].strip()
+            # Lines with environment markers are left to pip, which knows how to evaluate them
+            if not requirement or ";" in requirement:
+                continue
+            name, _, pinned = requirement.partition("==")
+            for separator in ("[", "<", ">", "!", "~", "="):
+                name = name.split(separator, 1)[0]
+            name = name.strip()
+            # Standard library modules (the default list names sqlite3) have no distribution to find
+            if name in getattr(sys, "stdlib_module_names", ()):
+                continue
+            try:
+                installed = importlib.metadata.version(name)
+            except importlib.metadata.PackageNotFoundError:
+                return False
+            if pinned and installed != pinned.strip():
+                return False
+        return True
+    
+    def write_if_missing(self, path: Path, content: bytes) -> bool:
+        """Create a file unless it already exists, checking and creating in a single open()"""
+        try:
+            with open(path, "xb") as f:
+                f.write(content)
+            return True
+        except FileExistsError:
+            return False
+    
+    def check_python_version(self) -> bool:
+        """Check if Python version is compatible"""
+        version = sys.version_info
+        if version.major < 3 or (version.major == 3 and version.minor < 8):
+            self.log(f"❌ Python 3.8+ required, found {version.major}.{version.minor}")
+            return False
+        self.log(f"✅ Python {version.major}.{version.minor} detected")
+        return True
+    
+    def check_node_version(self) -> bool:
+        """Check if Node.js is available"""
+        probe = _probe(("node", "--version"))
+        if probe is not None and probe[0] == 0:
+            self.log(f"✅ Node.js {probe[1]} detected")
+            return True
+        self.log("❌ Node.js not found")
+        return False
+    
+    def install_python_dependencies(self):
+        """Install Python dependencies for AI Engine"""
+        self.log("📦 Installing Python dependencies for AI Engine...")
+        
+        requirements_file = self.ai_engine_dir / "requirements.txt"
+        # Create requirements.txt if it doesn't exist
+        if self.write_if_missing(requirements_file, _REQUIREMENTS_TXT_BYTES):
+            self.log("Created requirements.txt")
+        
+        # Reading and hashing requirements.txt is far cheaper than letting pip resolve a no-op install.
+        # The interpreter is part of the digest so switching Pythons or venvs triggers a reinstall
+        stamp = self.logs_dir / ".requirements.sha256"
+        digest = self._dependency_digest(requirements_file.read_bytes(), sys.executable.encode())
+        # The stamp alone can't tell if the environment was recreated at the same path or a package was
+        # removed since, so the installed distributions are checked too (metadata reads, no pip)
+        if self._stamp_matches(stamp, digest) and self._requirements_installed(requirements_file):
+            self.log("✅ Python dependencies unchanged, skipping install")
+            return True
+        
+        # Output goes straight to a log file, so progress can be followed with tail -f instead of
+        # being held in memory until pip exits
+        install_log = self.logs_dir / "pip_install.log"
+        try:
+            with open(install_log, "wb") as log_file:
+                subprocess.run([
+                    sys.executable, "-m", "pip", "install", "-r", str(requirements_file)
+                ], check=True, stdout=log_file, stderr=subprocess.STDOUT)
+            stamp.write_text(digest)
+            self.log("✅ Python dependencies installed successfully")
+            return True
+        except subprocess.CalledProcessError as e:
+            self.log(f"❌ Failed to install Python dependencies: {e} (see {install_log})")
+            return False
+    
+    def install_node_dependencies(self):
+        """Install Node.js dependencies for Scraper Service"""
+        self.log("📦 Installing Node.js dependencies for Scraper Service...")
+        
+        package_json = self.scraper_dir / "package.json"
+        # Create package.json if it doesn't exist
+        if self.write_if_missing(package_json, _PACKAGE_JSON_BYTES):
+            self.log("Created package.json")
         
-        with open(frontend_html, "w") as f:
-            f.write(frontend_content)
-        self.log("Created index.html")
+        # npm rewrites package-lock.json during install, so the digest is taken afterwards and
+        # node_modules must still be there for a matching digest to count
+        stamp = self.logs_dir / ".npm.sha256"
+        if (self.scraper_dir / "node_modules").is_dir() and self._stamp_matches(stamp, self._node_digest()):
+            self.log("✅ Node.js dependencies unchanged, skipping install")
+            return True
+        
+        install_log = self.logs_dir / "npm_install.log"
+        try:
+            with open(install_log, "wb") as log_file:
+                subprocess.run([
+                    "npm", "install"
+                ], cwd=self.scraper_dir, check=True, stdout=log_file, stderr=subprocess.STDOUT)
+            stamp.write_text(self._node_digest())
+            self.log("✅ Node.js dependencies installed successfully")
+            return True
+        except subprocess.CalledProcessError as e:
+            self.log(f"❌ Failed to install Node.js dependencies: {e} (see {install_log})")
+            return False
+    
+    def _node_digest(self) -> str:
+        """Digest of the scraper's package.json and package-lock.json"""
+        lock_file = self.scraper_dir / "package-lock.json"
+        return self._dependency_digest(
+            (self.scraper_dir / "package.json").read_bytes(),
+            lock_file.read_bytes() if lock_file.exists() else b""
+        )
+    
+    def create_environment_files(self):
+        """Create environment files with default settings"""
+        self.log("📝 Creating environment files...")
+        
+        # AI Engine .env
+        ai_env = self.ai_engine_dir / ".env"
+        env_content = f"""# AI Research Assistant Configuration
+SCRAPER_SERVICE_URL=http://localhost:{self.scraper_port}
+DATABASE_URL=sqlite:///writing_assistant.db
+LOG_LEVEL=INFO
+"""
+        if self.write_if_missing(ai_env, env_content.encode("utf-8")):
+            self.log("Created ai_engine/.env")
+        
+        # Scraper Service .env
+        scraper_env = self.scraper_dir / ".env"
+        env_content = f"""# Scraper Service Configuration
+PORT={self.scraper_port}
+LOG_LEVEL=INFO
+"""
+        if self.write_if_missing(scraper_env, env_content.encode("utf-8")):
+            self.log("Created scraper_service/.env")
+    
+    def start_service(self, spec: ServiceSpec) -> bool:
+        """Spawn one service with its output going to its log file"""
+        self.log(f"🚀 Starting {spec.label}...")
+        
+        try:
+            process = subprocess.Popen(
+                spec.argv, cwd=spec.cwd,
+                stdout=self._open_logfile(spec.log_file),
+                stderr=subprocess.STDOUT
+            )
+            
+            self.processes[spec.name] = process
+            self.log(f"✅ {spec.label} started")
+            return True
+            
+        except Exception as e:
+            self.log(f"❌ Failed to start {spec.label}: {e}")
+            return False
+    
+    def watch_service(self, name: str, process: subprocess.Popen):
+        """Block until a service exits and report it if that wasn't part of shutdown"""
+        returncode = process.wait()
+        if not self._stop.is_set():
+            self.log(f"⚠️  {name} exited unexpectedly with code {returncode} (see logs/)")
+    
+    def stop_service(self, name: str, process: subprocess.Popen, timeout: float = 5.0):
+        """Terminate a service and reap it, killing it if it doesn't exit in time"""
+        process.terminate()
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            self.log(f"Killed {name} after it ignored terminate")
+        self.log(f"Stopped {name}")
+    
+    def start_services(self) -> bool:
+        """Start every service, then wait for all of them to come up together"""
+        # The frontend server serves this page, so it has to exist first
+        self.create_frontend()
+        
+        # The services don't depend on each other to spawn, so they are launched back to back
+        for spec in self.services:
+            if not self.start_service(spec):
+                if spec.required:
+                    return False
+                self.log(f"⚠️  {spec.label} failed to start. Continuing without it.")
+        
+        # Startup time is the slowest service's, not the sum of all of them
+        started = [spec for spec in self.services if spec.name in self.processes]
+        
+        async def wait_all():
+            return await asyncio.gather(*(
+                self.wait_until_ready(self.processes[spec.name], spec.port, spec.health_path) for spec in started
+            ))
+        
+        ready = dict(zip((spec.name for spec in started), asyncio.run(wait_all())))
+        
+        for name, is_ready in ready.items():
+            if is_ready:
+                self.log(f"✅ {name} is ready")
+            else:
+                self.log(f"⚠️  {name} did not become ready")
+        return True
+    
+    async def wait_until_ready(self, process: subprocess.Popen, port: int, health_path: Optional[str] = None, timeout: float = 30.0) -> bool:
+        """Wait until a service accepts connections (and answers its health check), or its process exits"""
+        deadline = time.monotonic() + timeout
+        # Start polling fast, since services are often up within a fraction of a second
+        delay = 0.05
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                return False
+            try:
+                # The TCP connect doubles as the readiness check, and the health request reuses it
+                reader, writer = await asyncio.wait_for(asyncio.open_connection("localhost", port), 0.25)
+                try:
+                    if health_path is None:
+                        return True
+                    writer.write(f"GET {health_path} HTTP/1.0\r\nHost: localhost\r\n\r\n".encode("ascii"))
+                    await writer.drain()
+                    status_line = await asyncio.wait_for(reader.readline(), 2)
+                    if status_line.split(b" ", 2)[1:2] == [b"200"]:
+                        return True
+                finally:
+                    writer.close()
+            except (OSError, asyncio.TimeoutError):
+                pass
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+        return False
+    
+    def create_frontend(self):
+        """Create a simple frontend HTML file, unless one already exists"""
+        frontend_html = self.project_root / "index.html"
+        
+        if self.write_if_missing(frontend_html, _FRONTEND_HTML_BYTES):
+            self.log("🎨 Created index.html")
     
     def create_test_story(self):
         """Create a test story and chapter"""
+        # json and platform are imported where they're used so a plain launch doesn't pay for them up front
+        import json
+        
         self.log("📝 Creating test story...")
         
         test_story = {
@@ -433,86 +589,100 @@ LOG_LEVEL=INFO
     
     def test_system(self):
         """Test the complete system"""
+        import json
+        
         self.log("🧪 Testing system...")
         
-        try:
-            import requests
-        except ImportError:
-            subprocess.run([sys.executable, "-m", "pip", "install", "requests"])
-            import requests
-        
-        # Test health endpoints
-        services = {
-            "AI Engine": f"http://localhost:{self.ai_engine_port}/health",
-            "Scraper Service": f"http://localhost:{self.scraper_port}/health"
-        }
+        requests = _requests_module()
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
         
-        for service, url in services.items():
+        # One pooled session for the health checks and the generation request; connection failures
+        # are retried briefly rather than reported on the first refused connect
+        with requests.Session() as session:
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=2, backoff_factor=0.1))
+            session.mount("http://", adapter)
+            
+            # Test health endpoints
+            services = {
+                "AI Engine": f"http://localhost:{self.ai_engine_port}/health",
+                "Scraper Service": f"http://localhost:{self.scraper_port}/health"
+            }
+            
+            def check_health(service: str, url: str):
+                try:
+                    response = session.get(url, timeout=5)
+                    if response.status_code == 200:
+                        self.log(f"✅ {service} is healthy")
+                    else:
+                        self.log(f"❌ {service} returned status {response.status_code}")
+                except Exception as e:
+                    self.log(f"❌ {service} is not responding: {e}")
+            
+            # Probe the services in parallel so a hung one doesn't hold up the others' results
+            with ThreadPoolExecutor(max_workers=len(services)) as executor:
+                list(executor.map(check_health, services, services.values()))
+            
+            # Test chapter generation
+            self.log("📝 Testing chapter generation...")
+            test_story = self.create_test_story()
+            
             try:
-                response = requests.get(url, timeout=5)
+                response = session.post(
+                    f"http://localhost:{self.ai_engine_port}/generate-chapter",
+                    json=test_story,
+                    timeout=60
+                )
+                
                 if response.status_code == 200:
-                    self.log(f"✅ {service} is healthy")
+                    result = response.json()
+                    self.log(f"✅ Chapter generated successfully!")
+                    self.log(f"   Chapter ID: {result['chapter_id']}")
+                    self.log(f"   Word Count: {result['word_count']}")
+                    self.log(f"   Content Preview: {result['content'][:100]}...")
+                    
+                    # Save the generated chapter
+                    chapter_file = self.project_root / "generated_chapter.json"
+                    with open(chapter_file, "w") as f:
+                        json.dump(result, f, indent=2)
+                    self.log(f"✅ Generated chapter saved to: generated_chapter.json")
+                    
                 else:
-                    self.log(f"❌ {service} returned status {response.status_code}")
+                    self.log(f"❌ Chapter generation failed: {response.status_code} - {response.text}")
+                    
             except Exception as e:
-                self.log(f"❌ {service} is not responding: {e}")
-        
-        # Test chapter generation
-        self.log("📝 Testing chapter generation...")
-        test_story = self.create_test_story()
-        
-        try:
-            response = requests.post(
-                f"http://localhost:{self.ai_engine_port}/generate-chapter",
-                json=test_story,
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                self.log(f"✅ Chapter generated successfully!")
-                self.log(f"   Chapter ID: {result['chapter_id']}")
-                self.log(f"   Word Count: {result['word_count']}")
-                self.log(f"   Content Preview: {result['content'][:100]}...")
-                
-                # Save the generated chapter
-                chapter_file = self.project_root / "generated_chapter.json"
-                with open(chapter_file, "w") as f:
-                    json.dump(result, f, indent=2)
-                self.log(f"✅ Generated chapter saved to: generated_chapter.json")
-                
-            else:
-                self.log(f"❌ Chapter generation failed: {response.status_code} - {response.text}")
-                
-        except Exception as e:
-            self.log(f"❌ Chapter generation test failed: {e}")
+                self.log(f"❌ Chapter generation test failed: {e}")
     
     def create_desktop_shortcut(self):
         """Create desktop shortcut"""
+        import platform
+        
         self.log("🖥️ Creating desktop shortcut...")
         
         desktop_dir = Path.home() / "Desktop"
         if not desktop_dir.exists():
             desktop_dir = Path.home() / "Desktop"  # Try different path for different OS
         
-        if platform.system() == "Windows":
+        system = platform.system()
+        if system == "Windows":
             # Windows shortcut (batch file)
             shortcut_path = desktop_dir / "AI Writing Assistant.bat"
-            with open(shortcut_path, "w") as f:
-                f.write(f'cd /d "{self.project_root}"\n')
-                f.write(f'"{sys.executable}" launch_writing_assistant.py\n')
+            # Written as bytes in one call, with the CRLF line endings cmd.exe expects
+            shortcut_path.write_bytes(
+                f'cd /d "{self.project_root}"\r\n"{sys.executable}" launch_writing_assistant.py\r\n'.encode("utf-8")
+            )
             self.log(f"✅ Desktop shortcut created: {shortcut_path}")
             
-        elif platform.system() == "Darwin":  # macOS
+        elif system == "Darwin":  # macOS
             # macOS AppleScript app
             app_path = desktop_dir / "AI Writing Assistant.app"
-            app_path.mkdir(exist_ok=True)
+            macos_script = app_path / "Contents" / "MacOS" / "launch_script"
+            # Create the whole bundle tree (app, Contents, MacOS) in one call
+            macos_script.parent.mkdir(parents=True, exist_ok=True)
             
             # Info.plist
             info_plist = app_path / "Contents" / "Info.plist"
-            info_plist.parent.mkdir(exist_ok=True)
-            with open(info_plist, "w") as f:
-                f.write('''<?xml version="1.0" encoding="UTF-8"?>
+            info_plist.write_bytes(b'''<?xml version="1.0" encoding="UTF-8"?>
 <!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">
 <plist version="1.0">
 <dict>
@@ -528,21 +698,17 @@ LOG_LEVEL=INFO
 </plist>''')
             
             # Launch script
-            macos_script = app_path / "Contents" / "MacOS" / "launch_script"
-            macos_script.parent.mkdir(exist_ok=True)
-            with open(macos_script, "w") as f:
-                f.write(f'''#!/bin/bash
+            macos_script.write_bytes(f'''#!/bin/bash
 cd "{self.project_root}"
 "{sys.executable}" launch_writing_assistant.py
-''')
+'''.encode("utf-8"))
             macos_script.chmod(0o755)
             self.log(f"✅ Desktop shortcut created: {app_path}")
             
         else:  # Linux
             # Linux desktop file
             desktop_file = desktop_dir / "ai-writing-assistant.desktop"
-            with open(desktop_file, "w") as f:
-                f.write(f'''[Desktop Entry]
+            desktop_file.write_bytes(f'''[Desktop Entry]
 Version=1.0
 Type=Application
 Name=AI Writing Assistant
@@ -552,12 +718,22 @@ Icon=text-editor
 Path={self.project_root}
 Terminal=true
 Categories=Office;TextEditor;
-''')
+'''.encode("utf-8"))
             desktop_file.chmod(0o755)
             self.log(f"✅ Desktop shortcut created: {desktop_file}")
     
     def run(self):
         """Main execution"""
+        # Every exit path, including the early returns and exceptions, releases the log files
+        try:
+            return self._run()
+        finally:
+            for handle in self._log_handles:
+                handle.close()
+            self._logf.close()
+    
+    def _run(self):
+        """Set up, start and supervise the services until shutdown"""
         self.log("🚀 Starting AI Research Assistant for Writers Setup...")
         
         # Check prerequisites
@@ -578,13 +754,7 @@ Categories=Office;TextEditor;
         self.create_environment_files()
         
         # Start services
-        if not self.start_ai_engine():
-            return False
-        
-        if not self.start_scraper_service():
-            self.log("⚠️  Scraper service failed to start. Continuing without it.")
-        
-        if not self.start_frontend():
+        if not self.start_services():
             return False
         
         # Test the system
@@ -599,17 +769,24 @@ Categories=Office;TextEditor;
         self.log(f"🔍 API Docs: http://localhost:{self.ai_engine_port}/docs")
         self.log("\nPress Ctrl+C to stop all services")
         
-        # Keep the script running
-        try:
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            self.log("\n🛑 Shutting down services...")
-            for name, process in self.processes.items():
-                if process:
-                    process.terminate()
-                    self.log(f"Stopped {name}")
-            self.log("✅ All services stopped")
+        # Keep the script running until Ctrl+C or SIGTERM
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: self._stop.set())
+        for name, process in self.processes.items():
+            if process:
+                threading.Thread(target=self.watch_service, args=(name, process), daemon=True).start()
+        # Waiting in bounded slices lets signal handlers run: on Windows an untimed wait can't be
+        # interrupted by Ctrl+C. Each slice blocks, so this still doesn't busy-poll
+        while not self._stop.wait(0.5):
+            pass
+        
+        self.log("\n🛑 Shutting down services...")
+        running = {name: process for name, process in self.processes.items() if process}
+        if running:
+            # Stop the services concurrently so shutdown takes as long as the slowest one, not the sum
+            with ThreadPoolExecutor(max_workers=len(running)) as executor:
+                list(executor.map(self.stop_service, running, running.values()))
+        self.log("✅ All services stopped")
         
         return True
 
@@ -8,15 +8,18 @@ Setup script for AI Research Assistant for Writers
 """
 
 import os
+import shutil
 import subprocess
 import sys
 import time
 
-def run_command(command, cwd=None, shell=True):
-    """Run a command and return success status"""
+def run_command(command, cwd=None):
+    """Run a command (an argv list, executed directly without a shell) and return success status"""
     try:
-        print(f"Running: {command}")
-        result = subprocess.run(command, shell=shell, cwd=cwd, capture_output=True, text=True)
+        print(f"Running: {' '.join(command)}")
+        # Resolve the executable so Windows finds .cmd shims like npm.cmd without going through cmd.exe
+        executable = shutil.which(command[0]) or command[0]
+        result = subprocess.run([executable, *command[1:]], cwd=cwd, capture_output=True, text=True)
         if result.returncode != 0:
             print(f"Error: {result.stderr}")
             return False
@@ -33,16 +36,16 @@ def setup_ai_engine():
     ai_engine_dir = os.path.join(os.path.dirname(__file__), "ai_engine")
     
     # Create virtual environment
-    if not run_command(f"cd {ai_engine_dir} && python -m venv venv"):
+    if not run_command([sys.executable, "-m", "venv", "venv"], cwd=ai_engine_dir):
         return False
     
-    # Activate virtual environment and install requirements
+    # Install requirements with the venv's own interpreter, which needs no activation step
     if sys.platform == "win32":
-        pip_cmd = f"cd {ai_engine_dir} && venv\\Scripts\\pip install -r requirements.txt"
+        venv_python = os.path.join(ai_engine_dir, "venv", "Scripts", "python.exe")
     else:
-        pip_cmd = f"cd {ai_engine_dir} && source venv/bin/activate && pip install -r requirements.txt"
+        venv_python = os.path.join(ai_engine_dir, "venv", "bin", "python")
     
-    if not run_command(pip_cmd):
+    if not run_command([venv_python, "-m", "pip", "install", "-r", "requirements.txt"], cwd=ai_engine_dir):
         return False
     
     print("✅ AI Engine setup complete")
@@ -55,7 +58,7 @@ def setup_scraper_service():
     scraper_dir = os.path.join(os.path.dirname(__file__), "scraper_service")
     
     # Install Node.js dependencies
-    if not run_command(f"cd {scraper_dir} && npm install"):
+    if not run_command(["npm", "install"], cwd=scraper_dir):
         return False
     
     print("✅ Scraper Service setup complete")
@@ -70,10 +73,8 @@ def create_env_files():
     ai_env_file = os.path.join(os.path.dirname(__file__), "ai_engine", ".env")
     
     if os.path.exists(ai_env_example) and not os.path.exists(ai_env_file):
-        with open(ai_env_example, 'r') as f:
-            content = f.read()
-        with open(ai_env_file, 'w') as f:
-            f.write(content)
+        # copyfile lets the kernel copy the bytes (sendfile on Linux) instead of round-tripping a str
+        shutil.copyfile(ai_env_example, ai_env_file)
         print("Created ai_engine/.env file")
     
     print("✅ Environment files created")
@@ -90,12 +91,12 @@ def main():
         sys.exit(1)
     
     # Check Node.js
-    if not run_command("node --version"):
+    if not run_command(["node", "--version"]):
         print("❌ Node.js is required but not installed")
         sys.exit(1)
     
     # Check npm
-    if not run_command("npm --version"):
+    if not run_command(["npm", "--version"]):
         print("❌ npm is required but not installed")
         sys.exit(1)
     